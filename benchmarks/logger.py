@@ -0,0 +1,61 @@
+# cost of a call to Logger.log, compared with the previous synchronous logger
+# (inspect.stack(), timestamp, print and file write in the caller)
+#
+#   python benchmarks/logger.py [number of calls]
+import os
+import sys
+import time
+import inspect
+import tempfile
+import contextlib
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logger
+
+
+def previous_log(file, *raw_data) -> None:  # Logger.log before it was asynchronous
+    data = ''
+    for element in raw_data:
+        data += ' ' + str(element)
+    data = data.rstrip()
+    if len(data) == 0:
+        return
+    stack = inspect.stack()[1]
+    filename = os.path.basename(stack.filename)
+    lineno = stack.lineno
+    time_text = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    line = f'[{filename}:{lineno}] [{time_text}] {data}'
+    print(line)
+    file.write(line + '\n')
+
+
+def measure(name: str, calls: int, function) -> None:
+    start = time.perf_counter()
+    for i in range(calls):
+        function(i)
+    duration = time.perf_counter() - start
+    print(f'{name:<40} {duration / calls * 1e6:8.2f} µs per call', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with tempfile.TemporaryDirectory() as folder, open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):  # the lines are also printed: do not measure the terminal
+        logger.LOG_DIR = folder
+        log = logger.Logger()
+
+        with open(os.path.join(folder, 'previous.log'), 'a') as file:
+            measure('previous, distinct messages', calls, lambda i: previous_log(file, 'accX is above max', i))
+            measure('previous, identical messages', calls, lambda i: previous_log(file, 'accX is above max'))
+
+        measure('distinct messages', calls, lambda i: log.log('accX is above max', i))
+        measure('distinct messages, caller=False', calls, lambda i: log.log('accX is above max', i, caller=False))
+        measure('identical messages (rate limited)', calls, lambda i: log.log('accX is above max'))
+        measure('level below the logger level', calls, lambda i: log.log('accX is above max', i, level=logger.DEBUG))
+
+        start = time.perf_counter()
+        log.close()  # wait for the background thread to write everything
+        print(f'{"background writing after the calls":<40} {time.perf_counter() - start:8.3f} s', file=sys.stderr)
@@ -9,3 +9,5 @@ else:
 LOG_DIR = os.path.join(APP_DIR, 'logs')
 
 SESSION_DIR = os.path.join(APP_DIR, 'sessions')
+
+MESH_CACHE_DIR = os.path.join(APP_DIR, 'cache')
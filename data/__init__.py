@@ -1,152 +1,245 @@
+from __future__ import annotations
 import json
-import serial as pyserial
-import random
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
 
 from constants import *
-from logger import Logger
-from session import Session
-from data.decoders import decoders
-from data.checks import check
+from logger import Logger, ERROR
+from data.checks import ErrorCounters
+from data.acquisition import Acquisition, FrameRingBuffer, FrameSplitter
+from data.decoders import decoders, binary_struct
+from data.plan import DecodePlan, IncorrectConfigurationException
+from data.derived import DerivedChannels
+from data.attitude import AttitudeFilter
+from data.raw import RawRing
+from data.store import ColumnStore
+if TYPE_CHECKING:
+    from session import Session
+    from session.writer import SessionWriter
 
 
 class DecodeException(Exception):
     pass
 
 
-class IncorrectConfigurationException(Exception):
-    pass
+class Batch:  # every frame fetched in one call to Data.fetch(): rows start to stop of the store
+    def __init__(self, store: ColumnStore) -> None:
+        self.store = store
+        self.start = len(store)
+        self.stop = self.start
+        self.errors = 0  # number of errors found in these frames (they are counted in Data.errors)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @property
+    def times(self) -> np.ndarray:  # reception time of each frame
+        return self.store.column('time', self.start, self.stop)
+
+    def values(self, key: str) -> tuple[np.ndarray, np.ndarray]:
+        # reception times and values of a data item, for every frame containing it
+        if key not in self.store.columns:
+            return np.empty(0), np.empty(0)
+        times = self.times
+        values = self.store.column(key, self.start, self.stop)
+        present = np.not_equal(values, None) if values.dtype == object else ~np.isnan(values)
+        if not present.all():  # only copy when some frames do not contain the item
+            return times[present], values[present]
+        return times, values
+
+    def contains(self, key: str) -> bool:  # at least one frame contains the data item
+        if key not in self.store.columns:
+            return False
+        values = self.store.column(key, self.start, self.stop)
+        if values.dtype == object:
+            return bool(np.not_equal(values, None).any())
+        return not np.isnan(values).all()
+
+    def last(self, key: str) -> any:  # most recent value of a data item (None if no frame contains it)
+        if key not in self.store.columns:
+            return None
+        for row in range(self.stop - 1, self.start - 1, -1):
+            value = self.store.get(key, row)
+            if value is not None:
+                return value
+        return None
 
 
 class Data:
-    raw_buffer = bytes()
-    buffer = []
-
     def __init__(self) -> None:
         self.logger = Logger()
+        self.errors = ErrorCounters()  # errors found in the frames, shown periodically
+
+        self.load_config()
+        self.saved_rows = 0  # rows of the store already written in the session
+
+        # raw data (not decoded): streamed to the session writer while a session is open,
+        # otherwise only the most recent frames are kept in a bounded ring
+        self.raw_ring = RawRing()
+        self.raw_writer = None
 
-        self.serial = pyserial.Serial()
-        self.serial.baudrate = 9600
-        self.serial.timeout = 0.5
+        # the serial port is read by a dedicated thread, frames are then picked from the ring buffer
+        self.frames = FrameRingBuffer()
+        self.splitter = FrameSplitter(self.decoder, self.config)
+        self.acquisition = Acquisition(self.frames, self.splitter)
+        self.acquisition.start()
 
+    def load_config(self) -> None:
         with open(os.path.join(APP_DIR, 'data_config.json'), 'r') as f:
             self.config = json.loads(f.read())
 
-    def process(self, data: list) -> (dict, list):
-        config_item_index = 0
+        # compile the config once, instead of looking it up for every value of every frame
+        self.plan = DecodePlan(self.config)
+        if self.config.get('format') not in decoders:
+            raise IncorrectConfigurationException('Incorrect configuration: unknown format')
+        self.decoder = decoders[self.config['format']]
+        if self.config['format'] == 'binary_struct':
+            # the layout is checked now, not when the first frame is received by the acquisition thread
+            binary_struct.get_layout(self.config)
+        self.store = ColumnStore(self.plan)  # every decoded value, column by column
+        self.derived = DerivedChannels(self.plan)  # channels computed from the decoded values (apogee, etc)
+        self.attitude = AttitudeFilter(self.plan) if self.plan.attitude is not None else None  # orientation
+
+    def process(self, data: list) -> tuple[dict, int]:
+        # decoded values of a frame, and number of errors found in it
         expected_data_count = 0
         out_data = {}
-        errors = []
-
-        for item_value in data:
-            # fetch the configuration (from data_config.json) of the current data item received
-            while True:
-                try:  # try to get find the item in the config
-                    item_name = list(self.config['items'].keys())[config_item_index]
-                    config_item = self.config['items'][item_name]
-                    config_item_index += 1
-                except Exception as e:  # if an exception is raised, it means the we don't know how to decode the received item data
-                    raise IncorrectConfigurationException(f'Incorrect configuration: {e}')
-
-                # if the config element does not have condition, or if that condition is true
-                # then we stop the while loop, and we proceed
-                if 'if' not in config_item or out_data[config_item['if']['key']] == config_item['if']['value']:
-                    expected_data_count += 1
-                    break
+        errors = 0
+
+        # walk the decoding plan: every item we expect to receive, in order
+        # (the conditional items are resolved using the values already decoded in out_data)
+        for field in self.plan.walk(out_data):
+            expected_data_count += 1
+            if expected_data_count > len(data):  # the frame is too short, just count the missing items
+                continue
+            item_value = data[expected_data_count - 1]
 
             # we convert the element to the corresponding python type
-            item_type = {
-                'string': str,
-                'int8': int,
-                'uint8': int,
-                'int16': int,
-                'uint16': int,
-                'int32': int,
-                'uint32': int,
-                'float': float,
-                'double': float
-            }[config_item['type']]
             try:
-                item_value = item_type(item_value)
+                item_value = field.convert(item_value)
             except ValueError:
                 # the value is not convertible to this type (eg: trying to convert "abc" to int)
-                errors.append({
-                    'message': f'Cannot convert {item_value} to {config_item["type"]}',
-                    'status_item': 'integrite',
-                    'severity': 2
-                })
-
-            # item_name is the variable name (eg. accX)
-            # item_value is the data received for this variable (eg. 3.78)
-            # config_item is the config (contained in data_config.json) for this variable (eg. {'type': 'float', 'checks': [...]}
+                self.errors.add(field.name, 'convert', item_value, field.type)
+                errors += 1
+                out_data[field.name] = item_value
+                continue
 
             # proceed to the data coherence check (minimum, maximum, etc)
-            if 'checks' in config_item:
-                check_messages = check(item_value, config_item['checks'], item_name)
-                if check_messages:
-                    for message in check_messages:
-                        errors.append({
-                            'message': message,
-                            'status_item': 'integrite',
-                            'severity': 2
-                        })
-
-            out_data[item_name] = item_value  # add the value to the list that will be returned
-        if len(out_data) != expected_data_count:  # if we got more or less data than expected
-            errors.append({
-                'message': f'Incorrect data count. Expected {expected_data_count} got {len(out_data)}',
-                'status_item': 'integrite',
-                'severity': 2
-            })
+            if field.check is not None:
+                errors += field.check(item_value, self.errors)
+
+            out_data[field.name] = item_value  # add the value to the list that will be returned
+
+        if len(data) != expected_data_count:  # if we got more or less data than expected
+            self.errors.add(None, 'count', len(data), expected_data_count)
+            errors += 1
         return out_data, errors
 
-    def fetch(self) -> (dict, list):
-        if bool(os.environ.get('DEBUG', False)):  # debug mode, so we don't need to have a serial connection
-            raw_data = ''
-            raw_data += str(random.randint(0, 50) / 10) + ','  # accX
-            raw_data += str(random.randint(0, 50) / 10) + ','  # accY
-            raw_data += str(random.randint(0, 50) / 10) + ','  # accZ
-            raw_data += str(random.randint(0, 50) / 10) + ','  # gyrX
-            raw_data += str(random.randint(0, 50) / 10) + ','  # gyrY
-            raw_data += str(random.randint(0, 50) / 10) + ','  # gyrZ
-            raw_data += str(random.randint(0, 50) / 10) + ','  # pres
-            raw_data += str(random.randint(0, 1000) / 10) + ','  # alt
-            raw_data += str(random.randint(0, 50) / 10) + '\n'  # temp
-            raw_data = raw_data.encode()
-        else:
-            raw_data = self.serial.readline()
-            self.serial.flush()
+    def decode(self, raw_data: bytes) -> list:
+        try:
+            return self.decoder.decode(raw_data, self.config)
+        except ValueError:  # not ascii (UnicodeDecodeError), or not a valid binary frame
+            raise DecodeException('Failed to decode')
+
+    def fetch(self) -> Batch:
+        # report the serial errors raised in the acquisition thread
+        error = self.acquisition.pop_error()
+        if error is not None:
+            raise error
 
-        self.raw_buffer += raw_data
+        # process every frame received since the last call, so we never lag behind the data stream
+        frames = self.frames.drain()
+        if self.raw_writer is not None:
+            self.raw_writer.write_raw(frames)
+        else:
+            for receive_time, raw_data in frames:
+                self.raw_ring.append(receive_time, raw_data)
 
+        batch = Batch(self.store)
+        if self.plan.tabular and hasattr(self.decoder, 'decode_batch'):
+            self.process_batch(batch, frames)
+        else:
+            for receive_time, raw_data in frames:
+                self.process_frame(batch, receive_time, raw_data)
+
+        batch.stop = len(self.store)
+        self.derived.compute(self.store, batch.start, batch.stop)
+        if self.attitude is not None:
+            self.attitude.compute(self.store, batch.start, batch.stop)
+        return batch
+
+    def reset(self) -> None:  # forget the data received so far (eg. when a session starts)
+        self.store.clear()
+        self.derived.reset()
+        if self.attitude is not None:
+            self.attitude.reset()
+        self.saved_rows = 0
+
+    def record_raw(self, writer: SessionWriter | None) -> None:
+        # start (or stop, if writer is None) streaming the raw data to a session writer
+        if writer is not None:
+            # the frames received just before the session started are kept too, for context
+            writer.write_raw(self.raw_ring.drain())
+        self.raw_writer = writer
+
+    def process_frame(self, batch: Batch, receive_time: float, raw_data: bytes) -> None:
         # we decode the raw data
         try:
-            decoded_raw = decoders[self.config['format']].decode(raw_data, self.config)
-        except UnicodeDecodeError:
-            raise DecodeException('Failed to decode')
+            decoded_raw = self.decode(raw_data)
+        except DecodeException:  # a corrupted frame only loses itself, not the whole batch
+            self.errors.add(None, 'decode', raw_data)
+            batch.errors += 1
+            return
 
         # we process the raw data (checks, filters)
         decoded, errors = self.process(decoded_raw)
-        self.buffer.append(decoded)
-        return decoded, errors
-
-    def save(self, session: Session) -> None:  # save the buffered data and the log
+        self.store.append(receive_time, decoded)
+        batch.errors += errors
+
+    def process_batch(self, batch: Batch, frames: list[tuple[float, bytes]]) -> None:
+        # decode every frame at once into an array (one row per frame, one column per item)
+        values, bad = self.decoder.decode_batch(b''.join(raw_data for _receive_time, raw_data in frames), self.config)
+        if values.dtype.names is not None:  # structured array (binary frames)
+            values = structured_to_unstructured(values, dtype=np.float64)
+        times = np.array([receive_time for receive_time, _raw_data in frames], dtype=np.float64)
+
+        # row of values of every frame (-1 for the frames that could not be decoded)
+        frame_rows = np.full(len(frames), -1)
+        frame_rows[np.setdiff1d(np.arange(len(frames)), bad)] = np.arange(len(values))
+
+        # the frames that could not be decoded (including the integer items that are not integers, see
+        # decode_batch) are decoded alone to know what is wrong
+        fallback = frame_rows == -1
+
+        # proceed to the data coherence check (minimum, maximum, etc) of every decoded row at once
+        for i, field in enumerate(self.plan.fields):
+            if field.check is not None:
+                column = values[:, i].astype(np.int64) if field.convert is int else values[:, i]
+                batch.errors += field.check.check_many(column, self.errors)
+
+        # store the valid rows, in order with the frames decoded alone
+        start = 0
+        for i in np.flatnonzero(fallback).tolist() + [len(frames)]:
+            rows = frame_rows[start:i]
+            if len(rows):
+                self.store.append_rows(times[start:i], values[rows])
+            if i < len(frames):
+                self.process_frame(batch, *frames[i])
+            start = i + 1
+
+    def save(self, session: Session) -> None:  # hand the decoded data to the session writer
         if session is not None:  # only do that if a session is open
-            # raw data, not decoded
-            with open(os.path.join(session.folder, 'data_raw.bin'), 'ab') as f:
-                f.write(self.raw_buffer)
-                self.raw_buffer = bytes()  # reset the buffer
-
-            csv_path = os.path.join(session.folder, 'data.csv')
-            # if the csv file does not exist, create it and write the columns names
-            if not os.path.exists(csv_path):
-                with open(csv_path, 'w') as f:
-                    f.write(','.join(self.buffer[0].keys()))
-
-            # write the decoded data into the csv
-            with open(csv_path, 'a') as f:
-                for line in self.buffer:
-                    f.write('\n')
-                    f.write(','.join(map(str, line.values())))
-                self.buffer = []  # reset the buffer
+            # (the raw data is already streamed to the writer by fetch())
+            # decoded data received since the last save (the writer reads a view of the store, without copying it)
+            stop = len(self.store)
+            session.writer.write_rows(self.store.view(self.saved_rows, stop))
+            self.saved_rows = stop
+
+            if session.writer.error is not None:
+                self.logger.log(f'Erreur: écriture de la session impossible ({session.writer.error})',
+                                level=ERROR)
+                session.writer.error = None
 
         self.logger.save()
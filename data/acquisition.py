@@ -0,0 +1,200 @@
+import os
+import time
+import random
+import threading
+
+import serial as pyserial
+
+
+class SplitException(Exception):  # the received bytes could not be cut into frames (eg. incorrect configuration)
+    pass
+
+
+class FrameRingBuffer:
+    # fixed size ring of received frames, shared between the acquisition thread (the only producer)
+    # and the GUI (the only consumer)
+    # with a single producer and a single consumer, no lock is needed: the producer only moves `head`
+    # and the consumer only moves `tail`, and both are plain int assignments
+    def __init__(self, capacity: int = 4096) -> None:
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.head = 0  # total number of frames pushed (written by the producer only)
+        self.tail = 0  # total number of frames popped (written by the consumer only)
+
+        self.overruns = 0  # number of times the producer found the buffer full
+        self.dropped = 0  # number of frames lost because the buffer was full
+        self.full = False
+
+    def __len__(self) -> int:
+        return self.head - self.tail
+
+    def push(self, frame: tuple[float, bytes]) -> bool:
+        if self.head - self.tail >= self.capacity:  # the consumer is too slow, drop the new frame
+            if not self.full:  # count one overrun per "full" episode, not per lost frame
+                self.overruns += 1
+                self.full = True
+            self.dropped += 1
+            return False
+
+        self.full = False
+        self.slots[self.head % self.capacity] = frame
+        self.head += 1  # publish the frame only once it is written
+        return True
+
+    def pop(self) -> tuple[float, bytes] | None:
+        if self.tail == self.head:  # nothing to read
+            return None
+
+        index = self.tail % self.capacity
+        frame = self.slots[index]
+        self.slots[index] = None
+        self.tail += 1
+        return frame
+
+    def drain(self) -> list[tuple[float, bytes]]:
+        # pop every frame available right now (frames pushed while draining are left for the next call)
+        frames = []
+        for _ in range(self.head - self.tail):
+            frames.append(self.pop())
+        return frames
+
+    def clear(self) -> None:
+        self.tail = self.head
+
+
+class FrameSplitter:
+    # cut the received byte stream into frames, using the split() function of the configured decoder
+    # bytes after the last complete frame are kept until the next call
+    max_pending = 65536  # if no frame can be found in that many bytes, the stream is garbage: forget it
+
+    def __init__(self, decoder, config: dict) -> None:
+        self.decoder = decoder
+        self.config = config
+        self.pending = bytearray()
+        self.discarded = 0  # number of bytes thrown away because no frame could be found in them
+
+    def feed(self, raw_data: bytes) -> list[bytes]:
+        self.pending += raw_data
+        frames = self.decoder.split(self.pending, self.config)
+        if len(self.pending) > self.max_pending:
+            self.discarded += len(self.pending)
+            self.pending.clear()
+        return frames
+
+    def reset(self) -> None:
+        self.pending.clear()
+
+
+def debug_frame() -> bytes:  # random frame, used when there is no serial connection (DEBUG mode)
+    raw_data = ''
+    raw_data += str(random.randint(0, 50) / 10) + ','  # accX
+    raw_data += str(random.randint(0, 50) / 10) + ','  # accY
+    raw_data += str(random.randint(0, 50) / 10) + ','  # accZ
+    raw_data += str(random.randint(0, 50) / 10) + ','  # gyrX
+    raw_data += str(random.randint(0, 50) / 10) + ','  # gyrY
+    raw_data += str(random.randint(0, 50) / 10) + ','  # gyrZ
+    raw_data += str(random.randint(0, 50) / 10) + ','  # pres
+    raw_data += str(random.randint(0, 1000) / 10) + ','  # alt
+    raw_data += str(random.randint(0, 50) / 10) + '\n'  # temp
+    return raw_data.encode()
+
+
+class Acquisition(threading.Thread):
+    # the acquisition thread owns the serial port: it reads everything available in one go,
+    # and pushes every complete frame (with its reception time) into the ring buffer
+    debug_interval = 0.05  # time between two generated frames in DEBUG mode
+
+    def __init__(self, frames: FrameRingBuffer, splitter: FrameSplitter, baudrate: int = 9600) -> None:
+        super().__init__(name='acquisition', daemon=True)
+        self.frames = frames
+        self.splitter = splitter
+        self.debug = bool(os.environ.get('DEBUG', False))
+
+        self.serial = pyserial.Serial()
+        self.serial.baudrate = baudrate
+        # short timeout, so the port lock is released often and open / close requests are not delayed
+        self.serial.timeout = 0.1
+
+        self.lock = threading.Lock()  # protects the serial port between reads and open / close
+        self.stop_event = threading.Event()
+        self.error = None  # last exception raised by the serial port, reported to the consumer
+
+    @property
+    def is_open(self) -> bool:
+        return self.serial.is_open
+
+    @property
+    def port(self) -> str | None:
+        return self.serial.port
+
+    def open(self, port: str) -> None:
+        with self.lock:
+            if self.serial.is_open:
+                self.serial.close()
+            self.serial.port = port
+            self.serial.open()
+            self.splitter.reset()  # do not glue the end of the previous stream to the new one
+            self.error = None
+
+    def close(self) -> None:
+        with self.lock:
+            if self.serial.is_open:
+                self.serial.close()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.close()
+
+    def pop_error(self) -> Exception | None:  # get the last serial error, and forget it
+        error, self.error = self.error, None
+        return error
+
+    @staticmethod
+    def frame_times(start: float, stop: float, count: int) -> list[float]:
+        # reception time of the `count` frames completed by one read: their bytes arrived between the end of the
+        # previous read (start) and the end of this one (stop), so the frames are spread evenly over that time
+        # (the last one at stop). giving them all the same time would make the rates computed from them
+        # (eg. a derivative) wrong
+        step = (stop - start) / count
+        return [stop - step * (count - 1 - i) for i in range(count)]
+
+    def run(self) -> None:
+        last_read = time.time()  # end of the previous read of the serial port
+        while not self.stop_event.is_set():
+            if self.debug:
+                self.frames.push((time.time(), debug_frame()))
+                self.stop_event.wait(self.debug_interval)
+                continue
+
+            with self.lock:
+                if self.serial.is_open:
+                    try:
+                        # read everything waiting in the OS buffer
+                        # (or block until at least one byte arrives, or the timeout expires)
+                        raw_data = self.serial.read(self.serial.in_waiting or 1)
+                    except pyserial.SerialException as e:
+                        # the device has probably been unplugged, close the port and let the GUI know
+                        self.error = e
+                        self.serial.close()
+                        raw_data = None
+                else:
+                    raw_data = None
+
+                # split inside the lock, so the splitter is not reset by open() while it is working
+                try:
+                    frames = self.splitter.feed(raw_data) if raw_data else []
+                except Exception as e:  # the thread must keep running: report the error to the GUI, drop the bytes
+                    self.error = SplitException(f'{type(e).__name__}: {e}')
+                    self.splitter.reset()
+                    frames = []
+
+            if raw_data is None:  # port closed, wait for it to be opened
+                self.stop_event.wait(0.1)
+                last_read = time.time()
+                continue
+
+            receive_time = time.time()
+            if frames:
+                for frame_time, frame in zip(self.frame_times(last_read, receive_time, len(frames)), frames):
+                    self.frames.push((frame_time, frame))
+            last_read = receive_time
@@ -0,0 +1,106 @@
+# attitude estimation: the gyroscope and accelerometer items are fused (Madgwick filter, IMU version)
+# into an orientation quaternion, stored as 4 columns (w, x, y, z). declared in data_config.json:
+#
+#   "attitude": {
+#     "gyr": ["gyrX", "gyrY", "gyrZ"],
+#     "acc": ["accX", "accY", "accZ"],
+#     "gyr_unit": "deg/s",             (or "rad/s")
+#     "beta": 0.1,                     (weight of the accelerometer correction)
+#     "columns": ["qw", "qx", "qy", "qz"]
+#   }
+#
+# the unit conversions, normalizations and time steps are computed for the whole batch at once,
+# only the filter recursion itself runs sample by sample
+import numpy as np
+
+from data.plan import DecodePlan, IncorrectConfigurationException
+from data.store import ColumnStore
+
+
+def tilt_quaternion(ax: float, ay: float, az: float) -> list[float]:
+    # orientation from the gravity only (no yaw), to start the filter close to the real attitude
+    roll = np.arctan2(ay, az)
+    pitch = np.arctan2(-ax, np.hypot(ay, az))
+    cr, sr = np.cos(roll / 2), np.sin(roll / 2)
+    cp, sp = np.cos(pitch / 2), np.sin(pitch / 2)
+    return [float(cr * cp), float(sr * cp), float(cr * sp), float(-sr * sp)]
+
+
+class AttitudeFilter:
+    max_step = 0.5  # seconds: longer gaps between two samples are not integrated (eg. lost connection)
+
+    def __init__(self, plan: DecodePlan) -> None:
+        config = plan.attitude
+        self.gyr = list(config.get('gyr', []))
+        self.acc = list(config.get('acc', []))
+        self.columns = plan.attitude_columns
+        numeric = {field.name for field in plan.fields if field.type != 'string'} | set(plan.derived)
+        if len(self.gyr) != 3 or len(self.acc) != 3 or not set(self.gyr + self.acc) <= numeric:
+            raise IncorrectConfigurationException(
+                'Incorrect configuration: attitude needs 3 gyr and 3 acc number items')
+        if len(self.columns) != 4:
+            raise IncorrectConfigurationException('Incorrect configuration: attitude needs 4 columns')
+        self.scale = np.pi / 180 if config.get('gyr_unit', 'deg/s') == 'deg/s' else 1
+        self.beta = config.get('beta', 0.1)
+        self.reset()
+
+    def reset(self) -> None:
+        self.q = None  # current orientation [w, x, y, z]
+        self.time = None  # reception time of the last sample
+
+    def compute(self, store: ColumnStore, start: int, stop: int) -> None:
+        # orientation at the rows start to stop of the store (the rows received since the last call)
+        if start == stop:
+            return
+        times = store.column('time', start, stop)
+        gyr = np.column_stack([store.column(name, start, stop) for name in self.gyr]) * self.scale
+        acc = np.column_stack([store.column(name, start, stop) for name in self.acc])
+        present = ~(np.isnan(gyr).any(axis=1) | np.isnan(acc).any(axis=1))
+        if not present.any():
+            return
+        rows = np.flatnonzero(present)
+        times, gyr, acc = times[rows], gyr[rows], acc[rows]
+
+        # whole batch at once: normalized gravity, time steps
+        norms = np.linalg.norm(acc, axis=1)
+        acc = np.divide(acc, norms[:, None], out=np.zeros_like(acc), where=norms[:, None] > 0)
+        steps = np.diff(np.concatenate(([times[0] if self.time is None else self.time], times)))
+        steps[(steps < 0) | (steps > self.max_step)] = 0
+
+        if self.q is None:
+            self.q = tilt_quaternion(*acc[0])
+
+        out = np.empty((len(rows), 4))
+        q0, q1, q2, q3 = self.q
+        beta = self.beta
+        for i, ((gx, gy, gz), (ax, ay, az), dt) in enumerate(zip(gyr.tolist(), acc.tolist(), steps.tolist())):
+            # rate of change of the quaternion from the gyroscope
+            dq0 = 0.5 * (-q1 * gx - q2 * gy - q3 * gz)
+            dq1 = 0.5 * (q0 * gx + q2 * gz - q3 * gy)
+            dq2 = 0.5 * (q0 * gy - q1 * gz + q3 * gx)
+            dq3 = 0.5 * (q0 * gz + q1 * gy - q2 * gx)
+
+            if ax or ay or az:
+                # gradient descent step towards the orientation where the gravity is measured
+                s0 = 4 * q0 * q2 * q2 + 2 * q2 * ax + 4 * q0 * q1 * q1 - 2 * q1 * ay
+                s1 = (4 * q1 * q3 * q3 - 2 * q3 * ax + 4 * q0 * q0 * q1 - 2 * q0 * ay - 4 * q1
+                      + 8 * q1 * q1 * q1 + 8 * q1 * q2 * q2 + 4 * q1 * az)
+                s2 = (4 * q0 * q0 * q2 + 2 * q0 * ax + 4 * q2 * q3 * q3 - 2 * q3 * ay - 4 * q2
+                      + 8 * q2 * q1 * q1 + 8 * q2 * q2 * q2 + 4 * q2 * az)
+                s3 = 4 * q1 * q1 * q3 - 2 * q1 * ax + 4 * q2 * q2 * q3 - 2 * q2 * ay
+                norm = (s0 * s0 + s1 * s1 + s2 * s2 + s3 * s3) ** 0.5
+                if norm:
+                    dq0 -= beta * s0 / norm
+                    dq1 -= beta * s1 / norm
+                    dq2 -= beta * s2 / norm
+                    dq3 -= beta * s3 / norm
+
+            q0, q1, q2, q3 = q0 + dq0 * dt, q1 + dq1 * dt, q2 + dq2 * dt, q3 + dq3 * dt
+            norm = (q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3) ** 0.5
+            q0, q1, q2, q3 = q0 / norm, q1 / norm, q2 / norm, q3 / norm
+            out[i] = q0, q1, q2, q3
+
+        self.q = [q0, q1, q2, q3]
+        self.time = times[-1]
+        for i, name in enumerate(self.columns):
+            store.column(name, start, stop)[rows] = out[:, i]
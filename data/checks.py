@@ -1,20 +1,161 @@
-def check(item_value: any, checks_list: dict, item_name: str) -> list:
-    error_messages = []
-    for check_name, check_value in checks_list.items():
-        # if a check does not pass, define the error message
-        if check_name == 'min_length' and len(item_value) < check_value:
-            error_messages.append(f'{item_name} is not long enough ({len(item_value)} < {check_value})')
+import time
 
-        if check_name == 'max_length' and len(item_value) > check_value:
-            error_messages.append(f'{item_name} is too long ({len(item_value)} > {check_value})')
+import numpy as np
 
-        if check_name == 'min' and item_value < check_value:
-            error_messages.append(f'{item_name} is below min ({item_value} < {check_value})')
 
-        if check_name == 'max' and item_value > check_value:
-            error_messages.append(f'{item_name} is above max ({item_value} > {check_value})')
+def lengths(values: np.ndarray) -> np.ndarray:  # length of every value of an array of strings
+    return np.fromiter((len(value) for value in values), np.int64, len(values))
 
-        if check_name == 'values_enum' and item_value not in check_value:
-            error_messages.append(f'{item_name}\'s value is not in defined enum {check_value}')
 
-    return error_messages
+def longest(values: list) -> any:
+    return max(values, key=len)
+
+
+def shortest(values: list) -> any:
+    return min(values, key=len)
+
+
+def latest(values: list) -> any:
+    return values[-1]
+
+
+# every check: (test telling if a value fails the check, same test for a whole array of values (violation mask),
+#               error message, worst of failing values)
+CHECKS = {
+    'min_length': (
+        lambda value, limit: len(value) < limit,
+        lambda values, limit: lengths(values) < limit,
+        lambda name, value, limit: f'{name} is not long enough ({len(value)} < {limit})',
+        shortest
+    ),
+    'max_length': (
+        lambda value, limit: len(value) > limit,
+        lambda values, limit: lengths(values) > limit,
+        lambda name, value, limit: f'{name} is too long ({len(value)} > {limit})',
+        longest
+    ),
+    'min': (
+        lambda value, limit: value < limit,
+        lambda values, limit: values < limit,
+        lambda name, value, limit: f'{name} is below min ({value} < {limit})',
+        min
+    ),
+    'max': (
+        lambda value, limit: value > limit,
+        lambda values, limit: values > limit,
+        lambda name, value, limit: f'{name} is above max ({value} > {limit})',
+        max
+    ),
+    'values_enum': (
+        lambda value, limit: value not in limit,
+        lambda values, limit: ~np.isin(values, limit),
+        lambda name, value, limit: f'{name}\'s value is not in defined enum {limit}',
+        latest
+    )
+}
+
+# the other errors found while processing the frames: (error message, worst of the values)
+ERRORS = {
+    'decode': (
+        lambda name, value, limit: 'Failed to decode',
+        latest
+    ),
+    'convert': (
+        lambda name, value, limit: f'Cannot convert {value} to {limit}',
+        latest
+    ),
+    'count': (
+        lambda name, value, limit: f'Incorrect data count. Expected {limit} got {value}',
+        latest
+    )
+}
+ERRORS.update({code: (message, worst) for code, (_failed, _violations, message, worst) in CHECKS.items()})
+
+
+class ErrorCounters:
+    # errors are only counted (per item and per error code, with the worst value),
+    # the messages are formatted when the summary is shown
+    def __init__(self) -> None:
+        self.counters = {}  # (item name, error code) -> [count, worst value, limit]
+        self.since = time.time()  # start of the counting
+
+    def add(self, name: str | None, code: str, value: any, limit: any = None) -> None:
+        counter = self.counters.get((name, code))
+        if counter is None:
+            self.counters[name, code] = [1, value, limit]
+        else:
+            counter[0] += 1
+            counter[1] = ERRORS[code][1]([counter[1], value])
+            counter[2] = limit
+
+    def add_many(self, name: str | None, code: str, values: np.ndarray, limit: any = None) -> None:
+        # the same error for many values at once
+        if not len(values):
+            return
+        values = values.tolist()
+        worst = ERRORS[code][1](values)
+        counter = self.counters.get((name, code))
+        if counter is None:
+            self.counters[name, code] = [len(values), worst, limit]
+        else:
+            counter[0] += len(values)
+            counter[1] = ERRORS[code][1]([counter[1], worst])
+            counter[2] = limit
+
+    def __len__(self) -> int:  # number of different errors
+        return len(self.counters)
+
+    def summary(self) -> list[str]:
+        # one line per error since the last summary, eg. "accX is above max (7.2 > 3): 312 times in last 5 s"
+        # (the message is the one of the worst value), then start counting again
+        now = time.time()
+        lines = []
+        for (name, code), (count, worst, limit) in self.counters.items():
+            message = ERRORS[code][0](name, worst, limit)
+            lines.append(f'{message}: {count} times in last {now - self.since:.0f} s' if count > 1 else message)
+        self.counters = {}
+        self.since = now
+        return lines
+
+
+class ColumnChecks:
+    # the checks of an item, compiled once: the check names are only looked up here
+    # a single value is checked with check(), a whole column of values (many frames) with check_many()
+    def __init__(self, checks_list: dict, item_name: str) -> None:
+        self.name = item_name
+        self.tests = []  # (check name, test, vectorized test, limit)
+        for check_name, check_value in checks_list.items():
+            if check_name not in CHECKS:
+                continue
+            failed, violations, _message, _worst = CHECKS[check_name]
+            self.tests.append((check_name, failed, violations, check_value))
+
+    def check(self, item_value: any, errors: ErrorCounters) -> int:
+        # count the failed checks, return how many failed
+        failed_count = 0
+        for check_name, failed, _violations, check_value in self.tests:
+            if failed(item_value, check_value):
+                errors.add(self.name, check_name, item_value, check_value)
+                failed_count += 1
+        return failed_count
+
+    __call__ = check
+
+    def masks(self, values: np.ndarray) -> dict[str, np.ndarray]:
+        # violation mask of every check: True for the values failing it
+        return {check_name: violations(values, check_value)
+                for check_name, _failed, violations, check_value in self.tests}
+
+    def check_many(self, values: np.ndarray, errors: ErrorCounters) -> int:
+        # count the failed checks of every value, return how many failed
+        failed_count = 0
+        for check_name, _failed, violations, check_value in self.tests:
+            mask = violations(values, check_value)
+            if mask.any():
+                errors.add_many(self.name, check_name, values[mask], check_value)
+                failed_count += int(mask.sum())
+        return failed_count
+
+
+def compile_checks(checks_list: dict, item_name: str) -> ColumnChecks:
+    return ColumnChecks(checks_list, item_name)
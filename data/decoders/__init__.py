@@ -1,5 +1,6 @@
-from data.decoders import ascii_char_separated
+from data.decoders import ascii_char_separated, binary_struct
 
 decoders = {
-    'ascii_char_separated': ascii_char_separated
+    'ascii_char_separated': ascii_char_separated,
+    'binary_struct': binary_struct
 }
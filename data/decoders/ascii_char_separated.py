@@ -1,2 +1,82 @@
+import numpy as np
+
+from data.plan import CONVERTERS
+
+
+def split(buffer: bytearray, config: dict) -> list[bytes]:
+    # remove every complete line from the buffer and return them (newline included),
+    # the incomplete last line is kept in the buffer until the rest of it is received
+    newline = config['newline'].encode('ascii')
+    end = buffer.rfind(newline)
+    if end == -1:  # no complete line yet
+        return []
+
+    end += len(newline)
+    lines = bytes(buffer[:end]).split(newline)[:-1]  # the last element is the empty string after the last newline
+    del buffer[:end]
+    return [line + newline for line in lines if line.strip()]  # skip empty lines
+
+
+def split_values(raw_data: bytes, config: dict, columns: int) -> tuple[np.ndarray, list[int]]:
+    # cut many lines at once into a 2-D array of values (one row per line, still as bytes)
+    # lines that do not have exactly `columns` values are left out, and their index is returned
+    newline = config['newline'].encode('ascii')
+    separator = config['separator'].encode('ascii')
+
+    lines = raw_data.split(newline)
+    if not lines[-1].strip():  # nothing after the last newline
+        lines.pop()
+
+    valid_lines = []
+    bad = []
+    for i, line in enumerate(lines):
+        if line.count(separator) == columns - 1:
+            valid_lines.append(line.strip())
+        else:
+            bad.append(i)
+
+    # every value of every valid line, split in a single call
+    values = separator.join(valid_lines).split(separator) if valid_lines else []
+    return np.array(values, dtype=bytes).reshape(len(valid_lines), columns), bad
+
+
+def decode_batch(raw_data: bytes, config: dict) -> tuple[np.ndarray, list[int]]:
+    # decode many lines at once into a 2-D array of floats (one row per line, one column per item)
+    # every item must be a number; lines that cannot be decoded are left out, and their index is returned
+    values, bad = split_values(raw_data, config, len(config['items']))
+
+    # the integer items must be integer literals, like for a frame decoded alone (int('3.0') fails):
+    # the lines where they are not (eg. "3.0", "1e1", "nan") are left out too
+    int_columns = [i for i, item in enumerate(config['items'].values()) if CONVERTERS.get(item.get('type')) is int]
+    if int_columns and len(values):
+        # what is left once the characters of an integer literal are removed
+        rest = np.char.translate(values[:, int_columns], None, deletechars=b'0123456789+-_ \t')
+        not_integer = (rest != b'').any(axis=1)
+        if not_integer.any():
+            line_indexes = np.setdiff1d(np.arange(len(values) + len(bad)), bad)
+            bad = sorted(bad + line_indexes[not_integer].tolist())
+            values = values[~not_integer]
+
+    try:
+        return values.astype(np.float64), bad
+    except ValueError:  # at least one value is not a number, find the faulty lines one by one
+        pass
+
+    skipped = set(bad)
+    line_indexes = [i for i in range(len(values) + len(bad)) if i not in skipped]
+    rows = []
+    for i, row in zip(line_indexes, values):
+        try:
+            rows.append(row.astype(np.float64))
+        except ValueError:
+            bad.append(i)
+    bad.sort()
+    return np.array(rows, dtype=np.float64).reshape(len(rows), values.shape[1]), bad
+
+
 def decode(raw_data: bytes, config: dict) -> list:
-    return raw_data.decode('ascii').strip().split(config['separator'])
+    # a single line: its number of values is not checked here, so use the number of separators
+    values, _ = split_values(raw_data, config, raw_data.count(config['separator'].encode('ascii')) + 1)
+    if not len(values):  # empty line
+        return []
+    return [value.decode('ascii') for value in values[0]]
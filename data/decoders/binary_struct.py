@@ -0,0 +1,122 @@
+# packed binary frames:
+#   sync word | payload length (uint8) | every item of data_config.json, in order, without padding
+# the layout is derived from the config: "endianness" ("little" or "big", little by default),
+# "sync" (hex string, "AA55" by default), and the type of every item ("string" items need a "size")
+import struct
+
+import numpy as np
+
+from data.plan import IncorrectConfigurationException
+
+# struct format character and numpy type of every type of data_config.json
+TYPES = {
+    'int8': ('b', 'i1'),
+    'uint8': ('B', 'u1'),
+    'int16': ('h', 'i2'),
+    'uint16': ('H', 'u2'),
+    'int32': ('i', 'i4'),
+    'uint32': ('I', 'u4'),
+    'float': ('f', 'f4'),
+    'double': ('d', 'f8')
+}
+
+
+class Layout:
+    def __init__(self, config: dict) -> None:
+        if config.get('endianness', 'little') not in ('little', 'big'):
+            raise IncorrectConfigurationException('Incorrect configuration: endianness must be "little" or "big"')
+        byte_order = {'little': '<', 'big': '>'}[config.get('endianness', 'little')]
+        try:
+            self.sync = bytes.fromhex(config.get('sync', 'AA55'))
+        except (ValueError, TypeError):
+            raise IncorrectConfigurationException('Incorrect configuration: sync must be a hex string')
+
+        struct_format = byte_order
+        fields = [('sync', f'V{len(self.sync)}'), ('length', 'u1')]
+        self.strings = []  # indexes of the string items, they are decoded to str after unpacking
+        for item_name, config_item in config['items'].items():
+            if 'if' in config_item:
+                raise IncorrectConfigurationException(
+                    f'Incorrect configuration: conditional item {item_name} in a fixed binary layout')
+
+            if config_item['type'] == 'string':
+                if 'size' not in config_item:
+                    raise IncorrectConfigurationException(
+                        f'Incorrect configuration: string item {item_name} has no size')
+                self.strings.append(len(fields) - 2)
+                struct_format += f'{config_item["size"]}s'
+                fields.append((item_name, f'S{config_item["size"]}'))
+            elif config_item['type'] not in TYPES:
+                raise IncorrectConfigurationException(f'Incorrect configuration: unknown type for {item_name}')
+            else:
+                struct_format += TYPES[config_item['type']][0]
+                fields.append((item_name, byte_order + TYPES[config_item['type']][1]))
+
+        self.payload = struct.Struct(struct_format)
+        if self.payload.size > 255:
+            raise IncorrectConfigurationException('Incorrect configuration: binary payload longer than 255 bytes')
+        self.header_size = len(self.sync) + 1
+        self.frame_size = self.header_size + self.payload.size
+        self.dtype = np.dtype(fields)  # one whole frame, used to decode many frames at once
+        self.names = list(config['items'].keys())
+
+
+_layouts = {}  # id of a config -> (config, layout), so the layout is only computed once per config
+
+
+def get_layout(config: dict) -> Layout:
+    cached = _layouts.get(id(config))
+    if cached is None or cached[0] is not config:
+        cached = (config, Layout(config))
+        _layouts[id(config)] = cached
+    return cached[1]
+
+
+def split(buffer: bytearray, config: dict) -> list[bytes]:
+    # remove every complete frame from the buffer and return them,
+    # bytes before a sync word are garbage (eg. the end of a frame we started to receive in the middle) and are dropped
+    layout = get_layout(config)
+    frames = []
+    start = 0
+    while True:
+        start = buffer.find(layout.sync, start)
+        if start == -1:  # no sync word, keep only what could be the beginning of one
+            start = max(len(buffer) - len(layout.sync) + 1, 0)
+            break
+        if len(buffer) - start < layout.frame_size:  # incomplete frame, wait for the rest of it
+            break
+        if buffer[start + len(layout.sync)] != layout.payload.size:  # not a real sync word, search again
+            start += 1
+            continue
+
+        frames.append(bytes(buffer[start:start + layout.frame_size]))
+        start += layout.frame_size
+
+    del buffer[:start]
+    return frames
+
+
+def decode(raw_data: bytes, config: dict) -> list:
+    layout = get_layout(config)
+    if len(raw_data) != layout.frame_size or not raw_data.startswith(layout.sync):
+        raise ValueError(f'Incorrect binary frame ({len(raw_data)} bytes)')
+
+    values = list(layout.payload.unpack_from(raw_data, layout.header_size))
+    for i in layout.strings:
+        values[i] = values[i].rstrip(b'\0').decode('ascii')
+    return values
+
+
+def decode_batch(raw_data: bytes, config: dict) -> tuple[np.ndarray, list[int]]:
+    # decode many consecutive frames at once, into a structured array (one field per item)
+    # frames with a wrong sync word or length are left out, and their indexes are returned
+    layout = get_layout(config)
+    count = len(raw_data) // layout.frame_size
+    frames = np.frombuffer(raw_data, dtype=layout.dtype, count=count)
+
+    valid = (frames['sync'] == np.void(layout.sync)) & (frames['length'] == layout.payload.size)
+    bad = np.flatnonzero(~valid).tolist()
+    if len(raw_data) % layout.frame_size:  # the trailing bytes are not a whole frame
+        bad.append(count)
+    return frames[valid][layout.names], bad
+
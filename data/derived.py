@@ -0,0 +1,164 @@
+# derived channels: values computed from the decoded items, declared in the "derived" section of data_config.json
+#
+#   "derived": {
+#     "apogee": {"type": "max", "source": "altitude"},
+#     "verticalSpeed": {"type": "derivative", "source": "altitude"},
+#     "altitudeFiltered": {"type": "ema", "source": "altitude", "alpha": 0.2},
+#     "accXMean": {"type": "mean", "source": "accX", "window": 50},
+#     "accXStd": {"type": "std", "source": "accX", "window": 50}
+#   }
+#
+# every channel keeps its state between batches, so a new sample costs O(1) (O(window) per batch for the windowed
+# ones), the history is never read again. a channel can use a channel declared before it as source
+# the values are stored in the store like the decoded items (NaN for the frames without the source item)
+import numpy as np
+
+from data.plan import DecodePlan, IncorrectConfigurationException
+from data.store import ColumnStore
+
+
+class RunningMax:
+    def __init__(self, _config: dict) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.value = np.nan
+
+    def update(self, _times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        out = np.fmax.accumulate(np.concatenate(([self.value], values)))[1:]
+        self.value = out[-1]
+        return out
+
+
+class RunningMin(RunningMax):
+    def update(self, _times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        out = np.fmin.accumulate(np.concatenate(([self.value], values)))[1:]
+        self.value = out[-1]
+        return out
+
+
+class Derivative:  # change per second between two consecutive samples (eg. vertical speed from the altitude)
+    # samples with the same time as the previous one (eg. from the same read of the serial port) are compared
+    # with the last sample received before that time, not with each other (which would divide by 0)
+    def __init__(self, _config: dict) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        # last sample, and last sample with an earlier time than it
+        self.time = self.previous_time = -np.inf
+        self.value = self.previous_value = np.nan
+
+    def update(self, times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        times = np.concatenate(([self.previous_time, self.time], times))
+        values = np.concatenate(([self.previous_value, self.value], values))
+        # for every new sample, the last sample with an earlier time
+        references = np.searchsorted(times, times[2:], side='left') - 1
+        references = np.maximum(references, 0)
+        delta_times = times[2:] - times[references]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out = np.where(delta_times > 0, (values[2:] - values[references]) / delta_times, np.nan)
+
+        last = max(np.searchsorted(times, times[-1], side='left') - 1, 0)
+        self.previous_time, self.previous_value = times[last], values[last]
+        self.time, self.value = times[-1], values[-1]
+        return out
+
+
+class Ema:  # exponential moving average: out = previous out + alpha * (value - previous out)
+    def __init__(self, config: dict) -> None:
+        self.alpha = config.get('alpha', 0.1)
+        if not 0 < self.alpha <= 1:
+            raise ValueError('alpha must be between 0 and 1')
+        self.reset()
+
+    def reset(self) -> None:
+        self.value = None
+
+    def update(self, _times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        out = np.empty(len(values))
+        value = self.value
+        for i, sample in enumerate(values.tolist()):  # each output depends on the previous one
+            value = sample if value is None else value + self.alpha * (sample - value)
+            out[i] = value
+        self.value = value
+        return out
+
+
+class WindowMean:  # mean of the last `window` samples
+    def __init__(self, config: dict) -> None:
+        self.window = config.get('window', 10)
+        if not isinstance(self.window, int) or self.window < 1:
+            raise ValueError('window must be a positive integer')
+        self.reset()
+
+    def reset(self) -> None:
+        self.last = np.empty(0)  # last window - 1 samples
+
+    def sums(self, values: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # sum of the values, sum of their squares and number of values in the window ending at every sample
+        samples = np.concatenate((self.last, values))
+        self.last = samples[len(samples) - self.window + 1:] if self.window > 1 else np.empty(0)
+
+        sums = np.concatenate(([0], np.cumsum(samples)))
+        squares = np.concatenate(([0], np.cumsum(samples * samples)))
+        ends = np.arange(len(samples) - len(values), len(samples)) + 1
+        starts = np.maximum(ends - self.window, 0)
+        return sums[ends] - sums[starts], squares[ends] - squares[starts], ends - starts
+
+    def update(self, _times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        sums, _squares, counts = self.sums(values)
+        return sums / counts
+
+
+class WindowStd(WindowMean):  # standard deviation of the last `window` samples
+    def update(self, _times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        sums, squares, counts = self.sums(values)
+        return np.sqrt(np.maximum(squares / counts - (sums / counts) ** 2, 0))
+
+
+DERIVED = {
+    'max': RunningMax,
+    'min': RunningMin,
+    'derivative': Derivative,
+    'ema': Ema,
+    'mean': WindowMean,
+    'std': WindowStd
+}
+
+
+class DerivedChannels:
+    def __init__(self, plan: DecodePlan) -> None:
+        numeric = {field.name for field in plan.fields if field.type != 'string'}
+        self.channels = []  # (name, source, channel), in the config order
+        for name, config in plan.derived.items():
+            if name in plan.names:
+                raise IncorrectConfigurationException(f'Incorrect configuration: {name} is already an item')
+            if config.get('type') not in DERIVED:
+                raise IncorrectConfigurationException(f'Incorrect configuration: unknown type for {name}')
+            if config.get('source') not in numeric:
+                raise IncorrectConfigurationException(
+                    f'Incorrect configuration: the source of {name} must be a number item or a channel defined before')
+            try:
+                channel = DERIVED[config['type']](config)
+            except ValueError as e:
+                raise IncorrectConfigurationException(f'Incorrect configuration: {name}: {e}')
+            self.channels.append((name, config['source'], channel))
+            numeric.add(name)
+
+    def reset(self) -> None:
+        for _name, _source, channel in self.channels:
+            channel.reset()
+
+    def compute(self, store: ColumnStore, start: int, stop: int) -> None:
+        # compute the channels for the rows start to stop of the store (the rows received since the last call)
+        if start == stop:
+            return
+        times = store.column('time', start, stop)
+        for name, source, channel in self.channels:
+            values = store.column(source, start, stop)
+            present = ~np.isnan(values)
+            out = store.column(name, start, stop)
+            if present.all():
+                out[:] = channel.update(times, values)
+            elif present.any():
+                out[present] = channel.update(times[present], values[present])
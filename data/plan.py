@@ -0,0 +1,99 @@
+# data_config.json is compiled once (when it is loaded) into a decoding plan,
+# so processing a frame only walks a list instead of looking everything up in the config
+from data.checks import compile_checks
+
+
+class IncorrectConfigurationException(Exception):
+    pass
+
+
+# default names of the attitude quaternion columns (data/attitude.py)
+ATTITUDE_COLUMNS = ['qw', 'qx', 'qy', 'qz']
+
+# python type corresponding to every type of data_config.json
+CONVERTERS = {
+    'string': str,
+    'int8': int,
+    'uint8': int,
+    'int16': int,
+    'uint16': int,
+    'int32': int,
+    'uint32': int,
+    'float': float,
+    'double': float
+}
+
+
+class FieldPlan:  # how to decode one item of the frame
+    __slots__ = ('name', 'type', 'convert', 'check', 'config')
+
+    def __init__(self, name: str, config_item: dict) -> None:
+        if config_item.get('type') not in CONVERTERS:
+            raise IncorrectConfigurationException(f'Incorrect configuration: unknown type for {name}')
+
+        self.name = name  # variable name (eg. accX)
+        self.type = config_item['type']
+        self.convert = CONVERTERS[self.type]
+        # data coherence checks (minimum, maximum, etc), None if the item has no check
+        self.check = compile_checks(config_item['checks'], name) if 'checks' in config_item else None
+        self.config = config_item  # config of this item, as written in data_config.json
+
+
+class BranchPlan:  # consecutive conditional items depending on the same key
+    __slots__ = ('key', 'table')
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.table = {}  # value of the key -> items to decode when the key has this value
+
+    def add(self, value: any, field: FieldPlan) -> None:
+        self.table.setdefault(value, []).append(field)
+
+
+class DecodePlan:
+    def __init__(self, config: dict) -> None:
+        self.fields = []  # every item, in the config order
+        self.steps = []  # FieldPlan (always decoded) or BranchPlan (decoded depending on a previous value)
+
+        for item_name, config_item in config['items'].items():
+            field = FieldPlan(item_name, config_item)
+            self.fields.append(field)
+
+            if 'if' not in config_item:
+                self.steps.append(field)
+                continue
+
+            key, value = config_item['if']['key'], config_item['if']['value']
+            # the condition can only depend on an item decoded before this one
+            if key not in (f.name for f in self.fields[:-1]):
+                raise IncorrectConfigurationException(
+                    f'Incorrect configuration: {item_name} depends on {key}, which is not defined before it')
+
+            # group consecutive items depending on the same key in one branch
+            if not self.steps or not isinstance(self.steps[-1], BranchPlan) or self.steps[-1].key != key:
+                self.steps.append(BranchPlan(key))
+            self.steps[-1].add(value, field)
+
+        self.names = [field.name for field in self.fields]
+        # channels computed from the items (data/derived.py), and orientation quaternion (data/attitude.py)
+        self.derived = dict(config.get('derived', {}))
+        self.attitude = config.get('attitude')
+        self.attitude_columns = [] if self.attitude is None else list(self.attitude.get('columns', ATTITUDE_COLUMNS))
+        # every column computed from the items, stored as float columns after the items
+        self.computed = list(self.derived) + self.attitude_columns
+        self.flat = all(isinstance(step, FieldPlan) for step in self.steps)  # no conditional item
+        # frames always have the same numeric items: they can be decoded many at once into an array
+        self.tabular = self.flat and all(field.type != 'string' for field in self.fields)
+
+    def walk(self, out_data: dict):
+        # yield the items to decode, in order
+        # out_data must be filled with the decoded values as they are yielded, since branches depend on them
+        if self.flat:
+            yield from self.fields
+            return
+
+        for step in self.steps:
+            if isinstance(step, FieldPlan):
+                yield step
+            else:
+                yield from step.table.get(out_data.get(step.key), ())
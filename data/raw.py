@@ -0,0 +1,43 @@
+from collections import deque
+
+
+class RawRing:
+    # the most recent raw frames (not decoded) with their reception time,
+    # kept in a preallocated buffer so the memory used stays bounded when no session is recording them
+    def __init__(self, capacity: int = 65536) -> None:
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.end = 0  # total number of bytes written since the creation (the write position is end % capacity)
+        self.records = deque()  # (reception time, position in the stream, length) of every frame still in the buffer
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def append(self, receive_time: float, raw_data: bytes) -> None:
+        raw_data = raw_data[-self.capacity:]  # a frame bigger than the buffer can only be kept partially
+        length = len(raw_data)
+
+        # copy the frame, wrapping around the end of the buffer
+        position = self.end % self.capacity
+        first_part = min(length, self.capacity - position)
+        self.view[position:position + first_part] = raw_data[:first_part]
+        self.view[:length - first_part] = raw_data[first_part:]
+
+        self.records.append((receive_time, self.end, length))
+        self.end += length
+
+        # forget the frames that have been (even partially) overwritten
+        while self.records[0][1] < self.end - self.capacity:
+            self.records.popleft()
+
+    def drain(self) -> list[tuple[float, bytes]]:
+        # every frame still in the buffer, oldest first, and empty the buffer
+        frames = []
+        for receive_time, start, length in self.records:
+            position = start % self.capacity
+            first_part = min(length, self.capacity - position)
+            frames.append((receive_time, bytes(self.view[position:position + first_part]) +
+                           bytes(self.view[:length - first_part])))
+        self.records.clear()
+        return frames
@@ -0,0 +1,99 @@
+import numpy as np
+
+from data.plan import DecodePlan
+
+
+class ColumnStore:
+    # every decoded value, stored column by column: one numpy array per item, plus the reception time
+    # the ui elements, the session writer and the analysis code all read views of these arrays (no copy)
+    # numeric items are stored as float64 so a missing value (conditional item, conversion error) can be NaN,
+    # string items are stored as python objects (None when missing)
+    chunk_size = 4096  # the columns grow by whole chunks of rows
+
+    def __init__(self, plan: DecodePlan) -> None:
+        self.names = plan.names
+        self.dtypes = {'time': np.float64}
+        self.integers = set()  # integer items, converted back to int when read as python values
+        for field in plan.fields:
+            self.dtypes[field.name] = object if field.type == 'string' else np.float64
+            if field.convert is int:
+                self.integers.add(field.name)
+        for name in plan.computed:  # computed from the items (derived channels, attitude)
+            self.dtypes[name] = np.float64
+
+        self.clear()
+
+    def clear(self) -> None:
+        self.length = 0  # number of rows written
+        self.capacity = 0  # number of rows allocated
+        self.columns = {name: np.empty(0, dtype) for name, dtype in self.dtypes.items()}
+        self.reserve(self.chunk_size)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def reserve(self, rows: int) -> None:
+        # make sure `rows` more rows can be written without reallocating
+        needed = self.length + rows
+        if needed <= self.capacity:
+            return
+
+        # grow geometrically (rounded to whole chunks) so appending stays O(1) on average
+        capacity = max(self.capacity * 2, needed)
+        capacity = -(-capacity // self.chunk_size) * self.chunk_size
+        for name, column in self.columns.items():
+            new_column = np.full(capacity, None if column.dtype == object else np.nan, column.dtype)
+            new_column[:self.length] = column[:self.length]
+            # views taken before keep the previous array alive, and its rows never change
+            self.columns[name] = new_column
+        self.capacity = capacity
+
+    def append(self, receive_time: float, frame: dict) -> None:
+        if self.length == self.capacity:
+            self.reserve(1)
+
+        row = self.length
+        self.columns['time'][row] = receive_time
+        for name, value in frame.items():
+            column = self.columns.get(name)
+            if column is None:
+                continue
+            if isinstance(value, str) and column.dtype != object:  # not converted (eg. "abc" for a float)
+                continue
+            column[row] = value
+        self.length += 1  # the row is only visible to the readers once it is complete
+
+    def append_rows(self, times: np.ndarray, values: np.ndarray) -> None:
+        # many frames at once: `values` has one row per frame and one column per item (in the config order)
+        self.reserve(len(times))
+
+        start, stop = self.length, self.length + len(times)
+        self.columns['time'][start:stop] = times
+        for i, name in enumerate(self.names):
+            self.columns[name][start:stop] = values[:, i]
+        self.length = stop
+
+    def column(self, name: str, start: int = 0, stop: int | None = None) -> np.ndarray:
+        # view of the rows written so far
+        return self.columns[name][start:self.length if stop is None else stop]
+
+    def view(self, start: int = 0, stop: int | None = None) -> dict[str, np.ndarray]:
+        return {name: self.column(name, start, stop) for name in self.columns}
+
+    def search(self, t0: float, t1: float) -> tuple[int, int]:
+        # rows received between t0 and t1 (reception times only increase, so we can use a binary search)
+        times = self.column('time')
+        return int(np.searchsorted(times, t0, 'left')), int(np.searchsorted(times, t1, 'right'))
+
+    def slice(self, t0: float, t1: float) -> dict[str, np.ndarray]:
+        return self.view(*self.search(t0, t1))
+
+    def get(self, name: str, row: int) -> any:
+        # python value of an item at a row (None if it is missing)
+        value = self.columns[name][row]
+        if value is None or (self.dtypes[name] is not object and np.isnan(value)):
+            return None
+        if name in self.integers:
+            return int(value)
+        return value if self.dtypes[name] is object else float(value)
+
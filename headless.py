@@ -0,0 +1,75 @@
+# headless recorder: acquisition, decoding, checks and session writing, without any window
+# (eg. a second ground station machine that only records)
+#
+#   python main.py --headless --port /dev/ttyUSB0
+#
+# only QtCore is used (event loop and timers of the scheduler), the widgets, pyqtgraph and Qt3D are never loaded.
+# a session is opened at the start and ended when the process is stopped (Ctrl+C or SIGTERM)
+import sys
+import signal
+
+import serial.serialutil
+from PyQt6 import QtCore
+
+import status
+import scheduler
+from data import Data
+from logger import Logger, WARNING
+from reception import Reception
+from session import Session
+
+
+class Recorder(QtCore.QObject):
+    reconnect_interval = 2  # seconds between two attempts to open the serial port
+    save_interval = 5  # seconds between two writes of the decoded data
+    error_summary_interval = 5  # seconds between two summaries of the errors found in the frames
+    scheduler_report_interval = 60  # seconds between two reports of the run time of the periodic tasks
+
+    def __init__(self, port: str | None, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self.logger = Logger()
+        self.port = port
+
+        self.scheduler = scheduler.Scheduler(self)
+        self.data = Data()
+        self.status = status.Status(self)  # no indicator to draw: the changes are logged and saved with the session
+        self.reception = Reception(self.data, self.status)
+
+        self.connect()
+        self.session = Session(self.data, self.status)
+
+        self.scheduler.add('data', self.reception.update, 0.05, scheduler.ACQUISITION)
+        self.scheduler.add('reconnect', self.connect, self.reconnect_interval, scheduler.HOUSEKEEPING)
+        self.scheduler.add('errors', self.reception.log_errors, self.error_summary_interval, scheduler.HOUSEKEEPING)
+        self.scheduler.add('scheduler report', self.scheduler.log_report, self.scheduler_report_interval,
+                           scheduler.HOUSEKEEPING)
+        self.scheduler.add('save', lambda: self.data.save(self.session), self.save_interval, scheduler.IO)
+
+    def connect(self) -> None:
+        # open the serial port, again if it has been lost (eg. receiver unplugged)
+        if self.port is None or self.data.acquisition.is_open:
+            return
+        try:
+            self.data.acquisition.open(self.port)
+        except serial.serialutil.SerialException as e:
+            self.logger.log(f'Could not open serial port {self.port}: {e}', level=WARNING)
+            return
+        self.logger.log(f'Connected to serial port {self.port}')
+
+    def stop(self) -> None:
+        self.session.end()
+        self.data.acquisition.stop()
+        self.session.wait_export()  # data.csv is complete when the process exits
+
+
+def run(port: str | None) -> int:
+    app = QtCore.QCoreApplication(sys.argv[:1])
+    recorder = Recorder(port)
+
+    # end the session cleanly (the signal handlers run between two tasks of the scheduler)
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_args: app.quit())
+
+    code = app.exec()
+    recorder.stop()
+    return code
@@ -1,58 +1,145 @@
-import inspect
+import sys
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
 
 from singleton import Singleton
 from constants import *
 
+# levels of the messages
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
 
 class Logger(metaclass=Singleton):
+    # log() only builds a record and puts it in a queue: a background thread formats the records,
+    # prints them and writes them into the log file, so logging costs almost nothing to the caller
+    level = INFO  # messages with a lower level are ignored
+    repeat_interval = 1  # seconds: an identical message is only written once per interval, the others are counted
+
     def __init__(self) -> None:
         if not os.path.exists(LOG_DIR):
             os.mkdir(LOG_DIR)
 
-        time = datetime.now().strftime('%d.%m.%Y-%H.%M.%S')
-        filename = f'{time}.log'
+        time_text = datetime.now().strftime('%d.%m.%Y-%H.%M.%S')
+        filename = f'{time_text}.log'
 
         self.log_path = os.path.join(LOG_DIR, filename)
 
         self.file = open(self.log_path, 'a')
 
-        self.log('Logger started')
+        # message -> [time it was last written, number of times it was logged since]
+        self.repeats = {}
+        self.repeats_lock = threading.Lock()
 
-    def save(self) -> None:
-        # to save the content of the file, close it and reopen it
-        self.file.close()
-        self.file = open(self.log_path, 'a')
+        self.listeners = []
+
+        self.records = queue.SimpleQueue()
+        self.writer = threading.Thread(target=self.write_records, name='logger', daemon=True)
+        self.writer.start()
+        atexit.register(self.close)  # write the last records when the application quits
 
-    MainWindow = None
+        self.log('Logger started')
 
-    def set_main_window(self, mw) -> None:
-        self.MainWindow = mw
+    def save(self) -> None:
+        # write the buffered content of the file to the disk, without closing it
+        self.records.put('flush')
+
+    def close(self) -> None:
+        if self.writer.is_alive():
+            self.records.put(None)
+            self.writer.join()
+
+    def add_listener(self, callback) -> None:
+        # callback(message, count) is called with every message logged (eg. the log box of the window),
+        # in the thread logging it: it must be fast. the repeats of a message that were not written are
+        # given later in one call, with their number as count
+        self.listeners.append(callback)
+
+    def notify(self, data: str, count: int = 1) -> None:
+        for listener in self.listeners:
+            listener(data, count)
+
+    def log(self, *raw_data: str | int | float | bool | list | dict | bytes, level: int = INFO,
+            caller: bool = True) -> None:
+        # caller=False does not look for the file and line of the caller (for code called very often)
+        if level < self.level:
+            return
 
-    def log(self, *raw_data: str | int | float | bool | list | dict | bytes) -> None:
         # convert everything to string, and clean it
-        data = ''
-        for element in raw_data:
-            data += ' ' + str(element)
-
-        data = data.rstrip()
+        data = ' '.join(str(element) for element in raw_data).rstrip()
 
         if len(data) == 0:  # don't log anything if there is no data
             return
 
-        # get some traceback: filename, line number, time
-        stack = inspect.stack()[1]
-        filename = os.path.basename(stack.filename)
-        lineno = stack.lineno
-        time = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-        line = f'[{filename}:{lineno}] [{time}] {data}'
+        now = time.time()
+        with self.repeats_lock:  # identical messages: only the first one of each interval is written
+            repeat = self.repeats.get(data)
+            if repeat is not None and now - repeat[0] < self.repeat_interval:
+                repeat[1] += 1
+                return
+            self.repeats[data] = [now, 0]
+            if repeat is not None and repeat[1]:  # the repeats of the previous interval, before the new message
+                self.records.put((now, INFO, '', 0, f'{data} (x{repeat[1] + 1})'))
+        if repeat is not None and repeat[1]:
+            self.notify(data, repeat[1])
+
+        # file and line of the caller (only the caller frame, not the whole stack)
+        filename, lineno = '', 0
+        if caller:
+            frame = sys._getframe(1)
+            filename, lineno = os.path.basename(frame.f_code.co_filename), frame.f_lineno
+
+        self.records.put((now, level, filename, lineno, data))
+
+        # eg. write it into the log box
+        self.notify(data)
+
+    def write_records(self) -> None:
+        # background thread: format and write the records
+        while True:
+            try:
+                record = self.records.get(timeout=self.repeat_interval)
+            except queue.Empty:
+                record = 'flush'
+
+            if record is None:  # closing
+                self.write_repeats(True)
+                self.file.close()
+                return
+            if record == 'flush':
+                self.write_repeats(False)
+                self.file.flush()
+                continue
+
+            self.write_line(*record)
+
+    def write_line(self, record_time: float, level: int, filename: str, lineno: int, data: str) -> None:
+        time_text = datetime.fromtimestamp(record_time).strftime('%d/%m/%Y %H:%M:%S')
+        line = f'[{filename}:{lineno}] [{time_text}] {data}' if filename else f'[{time_text}] {data}'
+        if level >= WARNING:
+            line = ('[WARNING] ' if level < ERROR else '[ERROR] ') + line
 
         # print into stdout
         print(line)
 
-        # write it into the log box
-        if self.MainWindow is not None:
-            self.MainWindow.handle_log(data)
-
         # write it into the log file
         self.file.write(line + '\n')
+
+    def write_repeats(self, closing: bool) -> None:
+        # write how many times the messages were logged during their interval (like the log box: "message (x3)"),
+        # and forget the old messages
+        now = time.time()
+        with self.repeats_lock:
+            ended = [(data, count) for data, (last_time, count) in self.repeats.items()
+                     if closing or now - last_time >= self.repeat_interval]
+            for data, _count in ended:
+                del self.repeats[data]
+        for data, count in ended:
+            if count:
+                self.write_line(now, INFO, '', 0, f'{data} (x{count + 1})')
+                self.notify(data, count)
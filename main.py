@@ -1,25 +1,46 @@
+import time
+import_start = time.perf_counter()  # start of the imports (--profile-startup)
+
 import sys
 import signal
-
-import pyqtgraph as pg
-from PyQt6 import QtWidgets
+import argparse
 
 from constants import *
-from window import MainWindow
+from startup_profile import StartupProfile
 
 signal.signal(signal.SIGINT, signal.SIG_DFL)  # allows to quit on KeyboardInterrupt
 
-pg.setConfigOption('background', (0, 0, 0, 0))  # transparent background
-pg.setConfigOption('antialias', True)
-
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='report the time spent in every phase of the start, until the first paint')
+    parser.add_argument('--headless', action='store_true',
+                        help='only record the data in a session, without any window')
+    parser.add_argument('--port', help='serial port of the receiver (headless mode)')
+    args, qt_args = parser.parse_known_args()  # the other arguments are given to Qt
+    if args.headless and args.port is None and not bool(os.environ.get('DEBUG', False)):
+        parser.error('--headless needs --port (the receiver is never chosen in a window)')
+
     if not os.path.exists(APP_DIR):
         os.mkdir(APP_DIR)
 
     if not os.path.exists(SESSION_DIR):
         os.mkdir(SESSION_DIR)
 
-    app = QtWidgets.QApplication(sys.argv)
-    win = MainWindow()
+    if args.headless:  # the widgets are never imported
+        import headless
+        sys.exit(headless.run(args.port))
+
+    from PyQt6 import QtWidgets
+    from window import MainWindow
+
+    profile = StartupProfile(import_start) if args.profile_startup else None
+    if profile is not None:
+        profile.mark('imports')
+
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    if profile is not None:
+        profile.mark('QApplication')
+    win = MainWindow(startup_profile=profile)
     win.show()
     sys.exit(app.exec())
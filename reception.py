@@ -0,0 +1,73 @@
+from __future__ import annotations
+import time
+from typing import TYPE_CHECKING
+
+import serial.serialutil
+
+import status
+from constants import *
+from logger import Logger, WARNING, ERROR
+from data.acquisition import SplitException
+if TYPE_CHECKING:
+    from data import Data, Batch
+
+
+class Reception:
+    # one step of the reception: fetch the frames received since the last step, and observe the status indicators
+    # (used by the window and by the headless recorder)
+    timeout = 4  # seconds without data before the timeout indicator turns red
+
+    def __init__(self, data: Data, indicators: status.Status) -> None:
+        self.data = data
+        self.status = indicators
+        self.logger = Logger()
+        self.debug = bool(os.environ.get('DEBUG', False))
+        self.last_successful_data = 0
+        self.dropped_frames = 0
+
+    def update(self) -> Batch | None:
+        # the new frames (None if the serial port is not open or failed)
+        no_data = time.time() - self.last_successful_data > self.timeout
+        self.status.set('timeout', status.RED if no_data else status.GREY)
+
+        if not self.data.acquisition.is_open and not self.debug:  # serial port is not open
+            self.status.set('connexion', status.RED)
+            self.status.set('recepteur', status.ORANGE)
+            self.status.set('integrite', status.GREY)
+            return None
+
+        # process every frame received by the acquisition thread since the last update
+        try:
+            batch = self.data.fetch()
+        except serial.serialutil.SerialException:
+            self.logger.log('Erreur: communication avec le récepteur impossible', level=ERROR)
+            self.status.set('connexion', status.RED)
+            self.status.set('recepteur', status.RED)
+            self.status.set('integrite', status.GREY)
+            return None
+        except SplitException as e:  # the port works, but the data cannot be cut into frames
+            self.logger.log(f'Erreur: données reçues illisibles ({e})', level=ERROR)
+            self.status.set('recepteur', status.GREEN)
+            self.status.set('integrite', status.RED)
+            return None
+
+        self.status.set('recepteur', status.GREEN)
+        self.status.set('connexion', status.RED if no_data else status.GREY)
+        # the errors are counted, and shown periodically by log_errors()
+        self.status.set('integrite', status.ORANGE if batch.errors else status.GREY)
+
+        if len(batch):
+            self.last_successful_data = time.time()
+
+        # the reception buffer was full, some frames have been lost
+        if self.data.frames.dropped != self.dropped_frames:
+            self.logger.log(f'Reception buffer overrun: {self.data.frames.dropped - self.dropped_frames} frames dropped',
+                            level=WARNING)
+            self.dropped_frames = self.data.frames.dropped
+        return batch
+
+    def log_errors(self) -> None:
+        # one line per error found since the last call, with the number of occurrences and the worst value
+        # (eg. "accX is above max (7.2 > 3): 312 times in last 5 s")
+        for line in self.data.errors.summary():
+            self.logger.log(line, level=WARNING, caller=False)
@@ -0,0 +1,129 @@
+import time
+
+from PyQt6 import QtCore
+
+from logger import Logger
+
+# priority classes of the tasks: when the event loop is busy, the first ones run first
+ACQUISITION = 0
+RENDER = 1
+HOUSEKEEPING = 2
+IO = 3
+PRIORITY_NAMES = ['acquisition', 'render', 'housekeeping', 'io']
+
+
+class Task:
+    __slots__ = ('name', 'callback', 'interval', 'priority', 'next_run', 'runs', 'total_time', 'max_time')
+
+    def __init__(self, name: str, callback, interval: float, priority: int) -> None:
+        self.name = name
+        self.callback = callback
+        self.interval = interval  # seconds
+        self.priority = priority
+        self.next_run = time.perf_counter() + interval  # like a QTimer, first run after one interval
+        self.runs = 0
+        self.total_time = 0  # seconds spent running the task
+        self.max_time = 0
+
+
+class Scheduler(QtCore.QObject):
+    # runs every periodic task of the application from a single timer, instead of one QTimer per task
+    # - the tasks due at the same time run by priority, and only acquisition tasks run once a tick
+    #   has used its time budget (the others wait for the next tick)
+    # - the render tasks are slowed down when the event loop is busy, and go back to their rate when it is not
+    # - the run time of every task is measured (report())
+    tick_budget = 0.02  # seconds
+    load_window = 1  # seconds: the load is measured over this duration
+    high_load = 0.5  # fraction of the time spent running tasks above which the render tasks are slowed down
+    low_load = 0.2  # fraction below which they go back to their rate
+    max_lateness = 0.05  # seconds: a tick this late also means the event loop is busy
+    max_slowdown = 4
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self.logger = Logger()
+        self.tasks = []  # sorted by priority
+        self.slowdown = 1  # the interval of the render tasks is multiplied by this
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run)
+        self.due = time.perf_counter()  # time the timer should fire
+
+        # load measurement
+        self.window_start = time.perf_counter()
+        self.busy_time = 0
+        self.lateness = 0  # maximum lateness of the ticks in the current window
+
+    def add(self, name: str, callback, interval: float, priority: int) -> Task:
+        # run callback every `interval` seconds
+        task = Task(name, callback, interval, priority)
+        self.tasks.append(task)
+        self.tasks.sort(key=lambda added_task: added_task.priority)
+        self.schedule()
+        return task
+
+    def interval(self, task: Task) -> float:
+        return task.interval * self.slowdown if task.priority == RENDER else task.interval
+
+    def run(self) -> None:
+        start = time.perf_counter()
+        self.lateness = max(self.lateness, start - self.due)
+        try:
+            for task in self.tasks:
+                now = time.perf_counter()
+                if task.next_run > now:
+                    continue
+                if task.priority != ACQUISITION and now - start > self.tick_budget:
+                    continue  # still due: runs at the next tick
+
+                task.callback()
+
+                duration = time.perf_counter() - now
+                task.runs += 1
+                task.total_time += duration
+                task.max_time = max(task.max_time, duration)
+
+                task.next_run += self.interval(task)
+                if task.next_run < now:  # late: do not run the missed occurrences
+                    task.next_run = now + self.interval(task)
+        finally:
+            self.busy_time += time.perf_counter() - start
+            self.adapt()
+            self.schedule()
+
+    def adapt(self) -> None:
+        # adapt the rate of the render tasks to the load of the event loop
+        now = time.perf_counter()
+        if now - self.window_start < self.load_window:
+            return
+        load = self.busy_time / (now - self.window_start)
+        if load > self.high_load or self.lateness > self.max_lateness:
+            self.slowdown = min(self.slowdown * 1.5, self.max_slowdown)
+        elif load < self.low_load:
+            self.slowdown = max(self.slowdown / 1.25, 1)
+        self.window_start = now
+        self.busy_time = 0
+        self.lateness = 0
+
+    def schedule(self) -> None:
+        # fire the timer when the next task is due
+        if not self.tasks:
+            return
+        self.due = min(task.next_run for task in self.tasks)
+        self.timer.start(max(0, round((self.due - time.perf_counter()) * 1000)))
+
+    def report(self) -> list[str]:
+        # one line per task: number of runs, mean and max run time, share of the time spent in the tasks
+        total = sum(task.total_time for task in self.tasks) or 1
+        lines = [f'Scheduler: render rate x{1 / self.slowdown:.2f}']
+        for task in self.tasks:
+            mean = task.total_time / task.runs if task.runs else 0
+            lines.append(f'  {task.name} ({PRIORITY_NAMES[task.priority]}): {task.runs} runs, '
+                         f'mean {mean * 1000:.2f}ms, max {task.max_time * 1000:.2f}ms, '
+                         f'{task.total_time / total * 100:.0f}%')
+        return lines
+
+    def log_report(self) -> None:
+        for line in self.report():
+            self.logger.log(line, caller=False)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+import uuid
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import utils
+from constants import *
+from logger import Logger
+from settings import Settings
+from session.format import session_columns
+from session.reader import SessionReader
+from session.writer import SessionWriter
+if TYPE_CHECKING:
+    from data import Data
+    from status import Status
+
+
+class Session:
+    # a recording: the data received from its start is written in a new session folder
+    # (the window and the headless recorder both open sessions, the session does not know about them)
+    def __init__(self, data: Data, indicators: Status | None = None) -> None:
+        self.data = data
+        self.status = indicators  # its changes during the session are saved with it
+        self.logger = Logger()
+
+        self.timer_start = datetime.now()
+
+        # create the session folder
+        self.id = str(uuid.uuid4())
+        self.folder = os.path.join(SESSION_DIR, self.id)
+        os.mkdir(self.folder)
+
+        self.logger.log('New session:', self.id)
+
+        self.data.reset()  # the session starts with no data
+
+        # the session files are written on a background thread
+        settings = Settings()
+        self.writer = SessionWriter(
+            self.folder,
+            session_columns(self.data.plan),
+            flush_interval=settings['session_flush_interval'] or 1,
+            fsync_interval=settings['session_fsync_interval'] if settings['session_fsync_interval'] is not None else 10
+        )
+        self.data.record_raw(self.writer)  # stream the raw data to the session files
+
+    def wait_export(self) -> None:
+        # wait for the csv export of the ended session (written in the background)
+        self.writer.wait_export()
+
+    @staticmethod
+    def load(session: str) -> SessionReader:
+        # open a recorded session for analysis, from its id or its folder
+        folder = session if os.path.isdir(session) else os.path.join(SESSION_DIR, session)
+        return SessionReader(folder)
+
+    def end(self) -> None:
+        self.data.save(self)
+        self.data.record_raw(None)
+        self.writer.close()  # wait for everything to be written on the disk
+        folder_size = utils.get_dir_size(self.folder)
+
+        # log & save some metadata
+        metrics = self.writer.metrics()
+        self.logger.log(f'Session ended: {self.id}')
+        self.logger.log(f'  Started on {self.timer_start}')
+        self.logger.log(f'  Total size: {folder_size}o')
+        self.logger.log(f'  Writes: {metrics["writes"]}, '
+                        f'mean {metrics["mean_write_time"] * 1000:.2f}ms, '
+                        f'max {metrics["max_write_time"] * 1000:.2f}ms, '
+                        f'max queue depth {metrics["max_queue_depth"]}')
+        # changes of the status indicators during the session
+        if self.status is not None:
+            self.status.save(os.path.join(self.folder, 'status.csv'), self.timer_start.timestamp())
+        with open(os.path.join(self.folder, 'info.txt'), 'w') as f:
+            f.writelines([
+                f'id: {self.id}\n',
+                f'start: {self.timer_start.timestamp()}\n',
+                f'end: {datetime.now().timestamp()}\n',
+                f'size: {folder_size}'
+            ])
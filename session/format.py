@@ -0,0 +1,247 @@
+# binary session file (data.bin): the decoded data, column by column, in chunks of rows
+#
+#   header:  MAGIC | schema length (uint32) | schema (json: name and numpy type of every column) | padding
+#   chunks:  CHUNK_HEADER (magic, rows, first and last reception time) | one flag per column: has missing values
+#            then for every column: its values | bitmask of the missing rows (only if it has missing values)
+#   footer:  index (json: position, rows and time range of every chunk) | FOOTER_TAIL (index length, magic)
+#
+# every block starts on a multiple of 8 bytes, so the columns can be used in place (memory map)
+# chunks are appended during the session: the footer is removed, a chunk is written, and the footer is written again
+# if the application stops before the footer is written, the index can be rebuilt by reading the chunk headers
+# float columns use NaN for missing values, the other columns (integers, strings) use the missing rows bitmask
+from __future__ import annotations
+import os
+import json
+import mmap
+import struct
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from data.plan import DecodePlan
+
+MAGIC = b'RCHCSES1'
+SCHEMA_LENGTH = struct.Struct('<I')
+CHUNK_HEADER = struct.Struct('<4sIdd')  # b'CHNK', rows, first reception time, last reception time
+CHUNK_MAGIC = b'CHNK'
+FOOTER_TAIL = struct.Struct('<Q8s')  # index length, b'RCHCIDX1'
+FOOTER_MAGIC = b'RCHCIDX1'
+
+# data_raw.idx: one record per raw frame, its reception time and its position in data_raw.bin,
+# so the raw data and the decoded data can be aligned afterwards
+RAW_INDEX_RECORD = struct.Struct('<dQ')
+RAW_INDEX_DTYPE = np.dtype([('time', '<f8'), ('position', '<u8')])
+
+# numpy type of every type of data_config.json
+# floats are stored as float64 so the values decoded from text are kept exactly
+TYPES = {
+    'int8': '<i1',
+    'uint8': '<u1',
+    'int16': '<i2',
+    'uint16': '<u2',
+    'int32': '<i4',
+    'uint32': '<u4',
+    'float': '<f8',
+    'double': '<f8'
+}
+
+
+def pad(size: int) -> int:  # size rounded up to a multiple of 8
+    return -(-size // 8) * 8
+
+
+def session_columns(plan: DecodePlan) -> list[tuple[str, str]]:
+    # name and numpy type of every column of the session file, the reception time first
+    columns = [('time', '<f8')]
+    for field in plan.fields:
+        if field.type == 'string':
+            size = field.config.get('size') or field.config.get('checks', {}).get('max_length') or 32
+            columns.append((field.name, f'S{size}'))
+        else:
+            columns.append((field.name, TYPES[field.type]))
+    columns += [(name, '<f8') for name in plan.computed]  # derived channels, attitude
+    return columns
+
+
+def chunk_layout(offset: int, rows: int, masked: list[bool], columns: list[tuple[str, str]]) -> dict:
+    # position of the values and of the missing rows bitmask (None if there is none) of every column of a chunk
+    position = offset + pad(CHUNK_HEADER.size) + pad(len(columns))
+    layout = {}
+    for (name, dtype), has_mask in zip(columns, masked):
+        values_position = position
+        position += pad(rows * np.dtype(dtype).itemsize)
+        mask_position = None
+        if has_mask:
+            mask_position = position
+            position += pad(-(-rows // 8))
+        layout[name] = (values_position, mask_position)
+    layout[None] = position  # end of the chunk
+    return layout
+
+
+def read_header(file) -> tuple[list[tuple[str, str]], int]:
+    # columns of the file, and position of the first chunk
+    file.seek(0)
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a session file')
+    schema_length, = SCHEMA_LENGTH.unpack(file.read(SCHEMA_LENGTH.size))
+    schema = json.loads(file.read(schema_length))
+    return [tuple(column) for column in schema['columns']], pad(len(MAGIC) + SCHEMA_LENGTH.size + schema_length)
+
+
+def read_index(file) -> tuple[list[dict], int]:
+    # chunks of the file, and position of the end of the last chunk (where the footer starts)
+    columns, first_chunk = read_header(file)
+
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    if size >= first_chunk + FOOTER_TAIL.size:
+        file.seek(size - FOOTER_TAIL.size)
+        index_length, magic = FOOTER_TAIL.unpack(file.read(FOOTER_TAIL.size))
+        if magic == FOOTER_MAGIC:  # the file was closed properly, the index is in the footer
+            footer_start = size - FOOTER_TAIL.size - index_length
+            file.seek(footer_start)
+            return json.loads(file.read(index_length))['chunks'], footer_start
+
+    # no footer: rebuild the index from the chunk headers, up to the first incomplete chunk
+    chunks = []
+    position = first_chunk
+    while position + CHUNK_HEADER.size <= size:
+        file.seek(position)
+        magic, rows, t0, t1 = CHUNK_HEADER.unpack(file.read(CHUNK_HEADER.size))
+        if magic != CHUNK_MAGIC:
+            break
+        file.seek(position + pad(CHUNK_HEADER.size))
+        flags = np.frombuffer(file.read(-(-len(columns) // 8)), np.uint8)
+        masked = np.unpackbits(flags)[:len(columns)].astype(bool).tolist()
+        end = chunk_layout(position, rows, masked, columns)[None]
+        if end > size:
+            break
+        chunks.append({'offset': position, 'rows': rows, 't0': t0, 't1': t1, 'masked': masked})
+        position = end
+    return chunks, position
+
+
+class ChunkWriter:
+    # appends chunks to a session file, keeping its index up to date
+    def __init__(self, path: str, columns: list[tuple[str, str]]) -> None:
+        self.columns = columns
+
+        if os.path.exists(path):  # continue an existing file
+            self.file = open(path, 'r+b')
+            self.chunks, self.end = read_index(self.file)
+        else:
+            self.file = open(path, 'w+b')
+            schema = json.dumps({'columns': columns}).encode()
+            header = MAGIC + SCHEMA_LENGTH.pack(len(schema)) + schema
+            self.file.write(header + bytes(pad(len(header)) - len(header)))
+            self.chunks = []
+            self.end = self.file.tell()
+            self.write_footer()
+
+    def append(self, values: dict[str, np.ndarray]) -> None:
+        # write a chunk from the store columns (float64 or objects, NaN or None when missing)
+        times = values['time']
+        rows = len(times)
+        if not rows:
+            return
+
+        blocks = []
+        masked = []
+        for name, dtype in self.columns:
+            column = values[name]
+            if dtype == '<f8':
+                data, missing = column.astype(dtype), None
+            elif dtype.startswith('S'):
+                missing = np.equal(column, None)
+                data = np.array([b'' if value is None else str(value).encode() for value in column], dtype)
+            else:
+                missing = np.isnan(column)
+                data = np.where(missing, 0, column).astype(dtype)
+            if missing is not None and not missing.any():
+                missing = None
+
+            block = data.tobytes()
+            blocks.append(block + bytes(pad(len(block)) - len(block)))
+            if missing is not None:
+                block = np.packbits(missing).tobytes()
+                blocks.append(block + bytes(pad(len(block)) - len(block)))
+            masked.append(missing is not None)
+
+        header = CHUNK_HEADER.pack(CHUNK_MAGIC, rows, float(times[0]), float(times[-1]))
+        header += bytes(pad(len(header)) - len(header))
+        flags = np.packbits(masked).tobytes()
+        flags += bytes(pad(len(self.columns)) - len(flags))
+
+        # replace the footer by the new chunk, then write the footer again
+        self.file.seek(self.end)
+        self.file.write(header + flags + b''.join(blocks))
+        self.chunks.append({'offset': self.end, 'rows': rows, 't0': float(times[0]), 't1': float(times[-1]),
+                            'masked': masked})
+        self.end = self.file.tell()
+        self.write_footer()
+
+    def write_footer(self) -> None:
+        index = json.dumps({'chunks': self.chunks}).encode()
+        self.file.seek(self.end)
+        self.file.write(index + FOOTER_TAIL.pack(len(index), FOOTER_MAGIC))
+        self.file.truncate()
+
+    def flush(self, fsync: bool) -> None:
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def chunk_values(buffer, chunk: dict, columns: list[tuple[str, str]],
+                 names: list[str] | None = None) -> dict[str, np.ndarray]:
+    # values of the columns of a chunk (every column if names is None),
+    # read from a buffer holding the whole file (bytes or memory map)
+    # the columns without missing values are views of the buffer (no copy), the others are converted
+    # to have missing values as NaN (floats and integers) or None (strings)
+    layout = chunk_layout(chunk['offset'], chunk['rows'], chunk['masked'], columns)
+    values = {}
+    for name, dtype in columns:
+        if names is not None and name not in names:
+            continue
+        values_position, mask_position = layout[name]
+        column = np.frombuffer(buffer, dtype, chunk['rows'], values_position)
+        if mask_position is not None:
+            missing = np.unpackbits(np.frombuffer(buffer, np.uint8, -(-chunk['rows'] // 8), mask_position))
+            missing = missing[:chunk['rows']].astype(bool)
+            if dtype.startswith('S'):
+                column = column.astype(object)
+                column[missing] = None
+            else:
+                column = column.astype(np.float64)
+                column[missing] = np.nan
+        values[name] = column
+    return values
+
+
+def export_csv(data_path: str, csv_path: str) -> None:
+    # write a session file as csv (one column per item, after the reception time), missing values are left empty
+    with open(data_path, 'rb') as file, open(csv_path, 'w') as csv_file:
+        columns, _ = read_header(file)
+        chunks, _ = read_index(file)
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        csv_file.write(','.join(name for name, _dtype in columns))
+        for chunk in chunks:
+            values = chunk_values(buffer, chunk, columns)
+            text_columns = []
+            for name, dtype in columns:
+                column = values[name]
+                if dtype.startswith('S'):
+                    text = ['' if value is None else value.decode() for value in column.tolist()]
+                elif dtype == '<f8':
+                    text = ['' if value != value else repr(value) for value in column.tolist()]  # NaN != NaN
+                else:  # integers (as floats if some are missing)
+                    text = ['' if value != value else str(int(value)) for value in column.tolist()]
+                text_columns.append(text)
+            for row in zip(*text_columns):
+                csv_file.write('\n')
+                csv_file.write(','.join(row))
@@ -0,0 +1,92 @@
+# read a recorded session for analysis (does not need the Qt interface)
+#
+#   with SessionReader(folder) as session:
+#       altitude = session['altitude']                 # whole channel
+#       values = session.slice(t0, t1, ['altitude'])   # time range
+#       for chunk in session.iter_chunks(['accX']):    # chunk by chunk, for sessions bigger than the memory
+#           ...
+import os
+import mmap
+
+import numpy as np
+
+from session.format import RAW_INDEX_DTYPE, read_header, read_index, chunk_values
+
+
+class SessionReader:
+    def __init__(self, folder: str) -> None:
+        self.folder = folder
+
+        # the file is memory mapped: only the parts actually read are loaded from the disk
+        self.file = open(os.path.join(folder, 'data.bin'), 'rb')
+        self.columns, _ = read_header(self.file)
+        self.chunks, _ = read_index(self.file)
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.names = [name for name, _dtype in self.columns]
+        # time range of every chunk, to find the chunks of a time range with a binary search
+        self.chunk_starts = np.array([chunk['t0'] for chunk in self.chunks], dtype=np.float64)
+        self.chunk_ends = np.array([chunk['t1'] for chunk in self.chunks], dtype=np.float64)
+
+    def __enter__(self) -> 'SessionReader':
+        return self
+
+    def __exit__(self, *_exception) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.file.close()  # the memory map stays open as long as views of it are used
+
+    def __len__(self) -> int:  # number of rows
+        return sum(chunk['rows'] for chunk in self.chunks)
+
+    @property
+    def start_time(self) -> float | None:
+        return self.chunks[0]['t0'] if self.chunks else None
+
+    @property
+    def end_time(self) -> float | None:
+        return self.chunks[-1]['t1'] if self.chunks else None
+
+    def chunk(self, index: int, names: list[str] | None = None) -> dict[str, np.ndarray]:
+        # values of a chunk, as views of the file
+        return chunk_values(self.buffer, self.chunks[index], self.columns,
+                            None if names is None else ['time'] + list(names))
+
+    def iter_chunks(self, names: list[str] | None = None, t0: float = -np.inf, t1: float = np.inf):
+        # yield the values chunk by chunk (only the chunks overlapping the t0 - t1 time range)
+        first, last = self.chunk_range(t0, t1)
+        for index in range(first, last):
+            yield self.chunk(index, names)
+
+    def chunk_range(self, t0: float, t1: float) -> tuple[int, int]:
+        # chunks overlapping the t0 - t1 time range (chunks are in time order)
+        first = int(np.searchsorted(self.chunk_ends, t0, 'left'))
+        last = int(np.searchsorted(self.chunk_starts, t1, 'right'))
+        return first, max(first, last)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        # a whole channel (a view of the file if the session has only one chunk, otherwise a copy)
+        return self.slice(-np.inf, np.inf, [name])[name]
+
+    def slice(self, t0: float, t1: float, names: list[str] | None = None) -> dict[str, np.ndarray]:
+        # values received between t0 and t1
+        parts = []
+        for values in self.iter_chunks(names, t0, t1):
+            # binary search of the time range in the chunk
+            start = int(np.searchsorted(values['time'], t0, 'left'))
+            stop = int(np.searchsorted(values['time'], t1, 'right'))
+            parts.append({name: column[start:stop] for name, column in values.items()})
+
+        names = self.names if names is None else ['time'] + list(names)
+        if len(parts) == 1:  # no need to copy
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) if parts
+                else np.empty(0, dict(self.columns)[name]) for name in names}
+
+    def raw_index(self) -> np.ndarray:
+        # reception time and position in data_raw.bin of every raw frame, to align the raw and decoded data
+        path = os.path.join(self.folder, 'data_raw.idx')
+        if not os.path.exists(path) or not os.path.getsize(path):
+            return np.empty(0, RAW_INDEX_DTYPE)
+        return np.memmap(path, RAW_INDEX_DTYPE, mode='r')
@@ -0,0 +1,164 @@
+import os
+import time
+import queue
+import atexit
+import threading
+
+import numpy as np
+
+from session.format import RAW_INDEX_RECORD, ChunkWriter, export_csv
+
+
+class SessionWriter(threading.Thread):
+    # writes the session files on its own thread, so a slow disk never stalls the interface
+    # the data to write is handed over through a queue, the files stay open during the whole session
+    chunk_rows = 1024  # rows of decoded data written in one chunk of data.bin
+
+    def __init__(self, folder: str, columns: list[tuple[str, str]],
+                 flush_interval: float = 1, fsync_interval: float = 10) -> None:
+        super().__init__(name='session writer', daemon=True)
+        self.folder = folder
+        self.flush_interval = flush_interval  # seconds between two flushes of the files
+        # seconds between two fsync (forced write to the disk), 0 to disable
+        # the decoded rows waiting for a full chunk are also written at this interval
+        self.fsync_interval = fsync_interval
+
+        self.queue = queue.Queue()
+        self.error = None  # last error raised while writing, reported to the GUI thread
+        self.closed = threading.Event()  # set once every file is written and closed
+        self.exported = threading.Event()  # set once the csv export is written (or has failed)
+
+        # metrics
+        self.writes = 0
+        self.total_write_time = 0
+        self.max_write_time = 0
+        self.max_queue_depth = 0
+
+        self.raw_file = open(os.path.join(folder, 'data_raw.bin'), 'ab')
+        self.raw_index_file = open(os.path.join(folder, 'data_raw.idx'), 'ab')
+        self.raw_position = self.raw_file.tell()  # position of the next raw frame in data_raw.bin
+
+        # decoded data
+        self.data_file = ChunkWriter(os.path.join(folder, 'data.bin'), columns)
+        self.pending = []  # views of the store waiting to be written in a chunk
+        self.pending_rows = 0
+
+        self.start()
+
+    def put(self, kind: str, payload: any = None) -> None:
+        self.queue.put((kind, payload))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def write_raw(self, frames: list[tuple[float, bytes]]) -> None:  # raw frames (not decoded) and their reception time
+        if frames:
+            self.put('raw', frames)
+
+    def write_rows(self, view: dict) -> None:  # decoded data (view of the data store)
+        if len(view['time']):
+            self.put('rows', view)
+
+    def close(self) -> None:
+        # write everything still in the queue, then close the files
+        # (the csv export is done after that, in the background: the application waits for it before exiting)
+        atexit.register(self.wait_export)
+        self.put('close')
+        self.closed.wait()
+
+    def wait_export(self) -> None:
+        self.exported.wait()
+
+    def metrics(self) -> dict:
+        return {
+            'writes': self.writes,
+            'mean_write_time': self.total_write_time / self.writes if self.writes else 0,
+            'max_write_time': self.max_write_time,
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth
+        }
+
+    def write(self, kind: str, payload: any) -> None:
+        if kind == 'raw':
+            index = bytearray()
+            for receive_time, raw_data in payload:
+                index += RAW_INDEX_RECORD.pack(receive_time, self.raw_position)
+                self.raw_position += len(raw_data)
+            self.raw_file.write(b''.join(raw_data for _receive_time, raw_data in payload))
+            self.raw_index_file.write(index)
+        elif kind == 'rows':
+            self.pending.append(payload)
+            self.pending_rows += len(payload['time'])
+            if self.pending_rows >= self.chunk_rows:
+                self.write_chunks(False)
+
+    def write_chunks(self, partial: bool) -> None:
+        # write the pending decoded rows as chunks of chunk_rows rows
+        # (partial: the rows left are written in a smaller chunk, otherwise they wait for more rows)
+        if not self.pending:
+            return
+        rows = {name: np.concatenate([view[name] for view in self.pending]) for name in self.pending[0]}
+        start = 0
+        while self.pending_rows - start >= self.chunk_rows or (partial and start < self.pending_rows):
+            stop = min(start + self.chunk_rows, self.pending_rows)
+            self.data_file.append({name: values[start:stop] for name, values in rows.items()})
+            start = stop
+        self.pending = [{name: values[start:] for name, values in rows.items()}] if start < self.pending_rows else []
+        self.pending_rows -= start
+
+    def flush(self, fsync: bool) -> None:
+        if fsync:
+            self.write_chunks(True)
+        for file in (self.raw_file, self.raw_index_file):
+            file.flush()
+            if fsync:
+                os.fsync(file.fileno())
+        self.data_file.flush(fsync)
+
+    def run(self) -> None:
+        last_flush = last_fsync = time.monotonic()
+        while True:
+            try:
+                kind, payload = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                kind = None
+
+            if kind == 'close':
+                break
+
+            try:
+                if kind is not None:
+                    start = time.perf_counter()
+                    self.write(kind, payload)
+                    write_time = time.perf_counter() - start
+                    self.writes += 1
+                    self.total_write_time += write_time
+                    self.max_write_time = max(self.max_write_time, write_time)
+
+                now = time.monotonic()
+                if now - last_flush >= self.flush_interval:
+                    fsync = self.fsync_interval and now - last_fsync >= self.fsync_interval
+                    self.flush(fsync)
+                    last_flush = now
+                    if fsync:
+                        last_fsync = now
+            except OSError as e:  # eg. the disk is full, keep going: the next writes might work
+                self.error = e
+
+        try:
+            self.flush(True)
+        except OSError as e:
+            self.error = e
+        self.raw_file.close()
+        self.raw_index_file.close()
+        self.data_file.close()
+        self.closed.set()
+
+        # the csv is only an export of data.bin, written once the session is over
+        try:
+            csv_path = os.path.join(self.folder, 'data.csv')
+            export_csv(os.path.join(self.folder, 'data.bin'), csv_path + '.tmp')
+            os.replace(csv_path + '.tmp', csv_path)
+        except OSError as e:
+            self.error = e
+        finally:
+            self.exported.set()
+            atexit.unregister(self.wait_export)
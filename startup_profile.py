@@ -0,0 +1,44 @@
+import time
+
+from PyQt6 import QtCore
+
+from logger import Logger
+
+
+class StartupProfile(QtCore.QObject):
+    # wall time of every phase of the start of the application (main.py --profile-startup)
+    # the last phase ends at the first paint of the window, then the report is printed and logged
+
+    def __init__(self, start: float) -> None:
+        super().__init__()
+        self.start = start  # time.perf_counter() at the start of the imports
+        self.last = start
+        self.phases = []  # (name, duration in seconds)
+
+    def mark(self, name: str) -> None:
+        # the phase `name` ends now
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def watch_first_paint(self, widget: QtCore.QObject) -> None:
+        widget.installEventFilter(self)
+
+    def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        if event.type() == QtCore.QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            self.mark('first paint')
+            self.log_report()
+        return False
+
+    def report(self) -> list[str]:
+        total = self.last - self.start
+        lines = [f'Startup: {total * 1000:.0f}ms']
+        for name, duration in self.phases:
+            lines.append(f'  {name}: {duration * 1000:.0f}ms ({duration / total * 100:.0f}%)')
+        return lines
+
+    def log_report(self) -> None:
+        logger = Logger()
+        for line in self.report():
+            logger.log(line, caller=False)
@@ -0,0 +1,68 @@
+import time
+
+from PyQt6 import QtCore
+
+from logger import Logger
+
+# states of a status indicator, and their name (used by the stylesheet: QLabel[status="red"])
+GREY = 0  # nothing to report
+RED = 1
+ORANGE = 2
+BLUE = 3
+GREEN = 4
+NAMES = ['grey', 'red', 'orange', 'blue', 'green']
+
+# how serious every state is: a more serious state is shown at once,
+# a less serious one only when it has been observed for `hold` seconds (so a single bad frame stays visible)
+SEVERITY = {GREY: 0, GREEN: 1, BLUE: 2, ORANGE: 3, RED: 4}
+
+
+class Indicator:  # state of one indicator (eg. connexion)
+    __slots__ = ('name', 'state', 'candidate', 'candidate_since')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.state = GREY  # state shown
+        self.candidate = GREY  # last state observed
+        self.candidate_since = 0  # time it has been observed since
+
+
+class Status(QtCore.QObject):
+    # status indicators: the observations are debounced, and `changed` is only emitted when a state changes
+    # every change is kept with its time, so it can be reviewed after the flight
+    changed = QtCore.pyqtSignal(str, int)  # indicator name, new state
+    indicators = ('connexion', 'integrite', 'recepteur', 'timeout')
+    hold = 0.5  # seconds
+
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self.logger = Logger()
+        self.items = {name: Indicator(name) for name in self.indicators}
+        self.history = []  # (time, indicator name, previous state, new state)
+
+    def __getitem__(self, name: str) -> int:
+        return self.items[name].state
+
+    def set(self, name: str, state: int, now: float | None = None) -> None:
+        # an observation of the state of an indicator
+        now = time.time() if now is None else now
+        item = self.items[name]
+        if state != item.candidate:
+            item.candidate = state
+            item.candidate_since = now
+
+        if state == item.state:
+            return
+        if SEVERITY[state] > SEVERITY[item.state] or now - item.candidate_since >= self.hold:
+            self.history.append((now, name, item.state, state))
+            self.logger.log(f'Status {name}: {NAMES[item.state]} -> {NAMES[state]}', caller=False)
+            item.state = state
+            self.changed.emit(name, state)
+
+    def save(self, path: str, since: float = 0) -> None:
+        # write the changes since a time (eg. the start of a session) as csv
+        with open(path, 'w') as file:
+            file.write('time,indicator,previous,state')
+            for change_time, name, previous, state in self.history:
+                if change_time >= since:
+                    file.write(f'\n{change_time!r},{name},{NAMES[previous]},{NAMES[state]}')
@@ -1,11 +1,7 @@
 from __future__ import annotations
 
 from .base_ui import Ui_MainWindow
-from .box import Box
-from .lcd import Lcd
-from .graph import Graph
-from .data_box import DataBox
-from .scene_3d import Scene3D
+from .log_console import LogConsole
 
 from typing import TYPE_CHECKING
 
@@ -14,11 +10,15 @@ if TYPE_CHECKING:
 
 from PyQt6 import QtWidgets
 import json
+import importlib
+import scheduler
+from data import Batch
 from constants import *
 
 
 class Ui:
     elements = []
+    fps = 30  # render rate of the elements (eg. graphs)
 
     def __init__(self, window: MainWindow):
         self.window = window
@@ -31,17 +31,36 @@ class Ui:
 
         self.window.gridCustomUi.setRowStretch(0, 0)
 
+        # index of the elements displaying each data item, so a batch only reaches the elements it changes
+        self.subscribers = {}
+        for element in self.elements:
+            for key in getattr(element, 'keys', []):
+                self.subscribers.setdefault(key, []).append(element)
+        self.renderers = [element for element in self.elements if hasattr(element, 'render')]
+
+        # the batches received since the last frame, delivered all at once by render()
+        self.pending = None
+
+        # the elements are drawn at a fixed rate, whatever the rate of the data
+        self.window.scheduler.add('ui', self.render, 1 / self.fps, scheduler.RENDER)
+
+    # class of every element type, the module is only imported when ui.json uses the type
+    # (eg. pyqtgraph for the graphs, Qt3D for the 3d scene)
     element_classes = {
-        'box': Box,
-        'lcd': Lcd,
-        'graph': Graph,
-        'data box': DataBox,
-        '3d scene': Scene3D
+        'box': 'ui.box.Box',
+        'lcd': 'ui.lcd.Lcd',
+        'graph': 'ui.graph.Graph',
+        'data box': 'ui.data_box.DataBox',
+        '3d scene': 'ui.scene_3d.Scene3D'
     }
 
+    def element_class(self, element_type: str) -> type:
+        module, name = self.element_classes[element_type].rsplit('.', 1)
+        return getattr(importlib.import_module(module), name)
+
     def process_element(self, properties: dict, parent: QtWidgets.QWidget, parent_grid: QtWidgets.QGridLayout):
         # get the class corresponding to the element name, and initialize it
-        element = self.element_classes[properties['type']](self.window, parent, parent_grid, properties)
+        element = self.element_class(properties['type'])(self.window, parent, parent_grid, properties)
 
         if isinstance(element.element, QtWidgets.QLayout):  # if the element is a layout
             parent_grid.addLayout(element.element,
@@ -67,12 +86,30 @@ class Ui:
 
     def reset(self):
         # reset every elements (eg: remove all data in graphs)
+        self.pending = None  # the rows of the pending batches no longer exist
         for element in self.elements:
             if hasattr(element, 'reset'):
                 element.reset()
 
-    def update_data(self, data: dict):
-        # set (or add) new data for every elements
-        for element in self.elements:
-            if hasattr(element, 'set_data'):
-                element.set_data(data)
+    def update_data(self, batch: Batch):
+        # the batches are consecutive rows of the store: until the next frame, only extend the pending rows
+        if self.pending is None:
+            self.pending = Batch(batch.store)
+            self.pending.start = batch.start
+        self.pending.stop = batch.stop
+
+    def render(self):
+        # called at a fixed rate: give the new data to the elements displaying it, then draw them
+        if self.pending is not None:
+            batch, self.pending = self.pending, None
+
+            changed = {}  # element -> the data items it displays that changed
+            for key, elements in self.subscribers.items():
+                if batch.contains(key):
+                    for element in elements:
+                        changed.setdefault(element, []).append(key)
+            for element, keys in changed.items():
+                element.set_data(batch, keys)
+
+        for element in self.renderers:
+            element.render()
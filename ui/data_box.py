@@ -1,44 +1,81 @@
 from __future__ import annotations
 from PyQt6 import QtWidgets
+from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont, QFontMetrics
 from typing import TYPE_CHECKING
+import utils
 
 
 if TYPE_CHECKING:
     from window import MainWindow
+    from data import Batch
+
+
+class CellGrid(QtWidgets.QWidget):  # widget calling a function when its width changes
+    def __init__(self, parent: QtWidgets.QWidget, on_resize) -> None:
+        super().__init__(parent)
+        self.on_resize = on_resize
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        if event.size().width() != event.oldSize().width():
+            self.on_resize()
 
 
 class DataBox:
-    data_series = {}
+    # one fixed size cell (label) per data item, "name: value", as many cells per line as the width allows
+    # the cells are only placed again when the width changes, and a label is only updated when its text changes
+    value_width = 8  # characters reserved for the value, if "value_width" is not in ui.json
 
     def __init__(self, window: MainWindow, parent: QtWidgets.QWidget, _parent_grid: QtWidgets.QLayout, properties: dict):
         self.window = window
         self.properties = properties
+        self.keys = list(properties.get('data', []))  # data items displayed
 
-        self.element = QtWidgets.QTextBrowser(parent)
-        font = QFont('monospace', 13)
-        self.char_width = QFontMetrics(font).averageCharWidth()
-        self.element.setFont(font)
+        self.element = CellGrid(parent, self.place_cells)
         self.element.setObjectName(self.properties['name'])
+        self.grid = QtWidgets.QGridLayout(self.element)
+        self.grid.setObjectName(self.properties['name'] + '_grid')
+        self.grid.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+
+        font = QFont('monospace', 13)
+        value_width = properties.get('value_width', self.value_width)
+        self.cell_width = QFontMetrics(font).averageCharWidth() * (4 + 2 + value_width + 3)
+
+        # "format" in ui.json: one format for every item (eg. "{:.2f}"), or one per item
+        # by default, as many significant digits as fit in the value_width characters of the cell
+        formats = properties.get('format', {})
+        self.cells = {}  # data item -> [label, name, format, text displayed]
+        for key in self.keys:
+            label = QtWidgets.QLabel(self.element)
+            label.setFont(font)
+            label.setFixedWidth(self.cell_width)
+            # the name is 4 chars exactly (truncated or with spaces before)
+            name = ' '*(4-len(key[:4])) + key[:4]
+            data_format = formats.get(key) if isinstance(formats, dict) else formats
+            data_format = data_format.format if data_format is not None \
+                else lambda value: utils.fit_text(value, value_width)
+            self.cells[key] = [label, name, data_format, None]
+
+        self.columns = 0  # number of cells per line
+        self.place_cells()
+
+    def place_cells(self):
+        columns = max(self.element.width() // self.cell_width, 1)
+        if columns == self.columns:
+            return
+        self.columns = columns
+        for i, (label, *_) in enumerate(self.cells.values()):
+            self.grid.addWidget(label, i // columns, i % columns)  # moves the label if it is already in the grid
 
-    def set_data(self, data: dict):
-        if 'data' in self.properties:
-            text = ''
-            current_line = ''
-            for i, data_item in enumerate(self.properties['data']):
-                if data_item in data:
-                    # set the name to be 4 chars exactly (truncate or add spaces before)
-                    data_name = ' '*(4-len(data_item[:4])) + data_item[:4]
-                    data_text = f'{data_name}: {data[data_item]}   '
-                    # if there is no more space in the text browser, start a new line
-                    if self.char_width*len(current_line + data_text) > self.element.width():
-                        text += current_line + '\n'
-                        current_line = data_text
-                    else:  # if there is still space, just append the new text
-                        current_line += data_text
-
-                    # if this is the last data item to display,
-                    # add the current line to the text (do not wait for it to be complete)
-                    if i == len(self.properties['data'])-1:
-                        text += current_line
-            self.element.setText(text)
+    def set_data(self, batch: Batch, keys: list[str]):
+        for key in keys:
+            value = batch.last(key)  # only the most recent value is displayed
+            if value is None:
+                continue
+            cell = self.cells[key]
+            label, name, data_format, text = cell
+            new_text = f'{name}: {data_format(value)}'
+            if new_text != text:  # the label is only repainted when its text changes
+                cell[3] = new_text
+                label.setText(new_text)
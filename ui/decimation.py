@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class MinMaxPyramid:
+    # min/max of a column of the data store over buckets of 2, 4, 8, ... rows (one level per bucket size)
+    # the levels are updated as the rows arrive, so any time range can be drawn with about 2 points per pixel
+    # while keeping the exact extremes (apogee, motor burnout...)
+    # the points themselves are not copied: they are read from views of the store (rows without the item are NaN)
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.length = 0  # rows of the store included in the levels
+        self.times = np.empty(0)  # views of the store columns
+        self.values = np.empty(0)
+        self.levels = []  # level k: [min, max, number of buckets] of the buckets of 2^(k + 1) rows
+
+    def __len__(self) -> int:
+        return self.length
+
+    @staticmethod
+    def grow(array: np.ndarray, length: int, needed: int) -> np.ndarray:
+        # geometric growth; the buckets already computed never change, so views of the previous array stay valid
+        if needed <= len(array):
+            return array
+        new_array = np.empty(max(needed, 2 * len(array)))
+        new_array[:length] = array[:length]
+        return new_array
+
+    def update(self, times: np.ndarray, values: np.ndarray) -> None:
+        # times and values: the whole time column and item column of the store (views), the reception times
+        # only increase. only the rows added since the last call are read
+        if len(times) < self.length:  # the store has been cleared
+            self.clear()
+        self.times, self.values = times, values
+        self.length = len(times)
+
+        # complete the buckets of every level from the level below (rows of the store for the first level)
+        # fmin / fmax ignore the rows without the item, a bucket is NaN only if no row of it has the item
+        lows, highs, count = values, values, self.length
+        level = 0
+        while count >= 2:
+            if level == len(self.levels):
+                self.levels.append([np.empty(0), np.empty(0), 0])
+            low, high, done = self.levels[level]
+            buckets = count // 2
+            if buckets > done:
+                low = self.grow(low, done, buckets)
+                high = self.grow(high, done, buckets)
+                low[done:buckets] = np.fmin(lows[2 * done:2 * buckets:2], lows[2 * done + 1:2 * buckets:2])
+                high[done:buckets] = np.fmax(highs[2 * done:2 * buckets:2], highs[2 * done + 1:2 * buckets:2])
+                self.levels[level] = [low, high, buckets]
+            lows, highs, count = low, high, buckets
+            level += 1
+
+    def query(self, x0: float, x1: float, width: int) -> tuple[np.ndarray, np.ndarray]:
+        # points to draw the x0 - x1 time range on `width` pixels: at most about 2 * width points
+        # (one more row on each side, so the line reaches the edges of the view)
+        start = max(int(np.searchsorted(self.times, x0, 'left')) - 1, 0)
+        stop = min(int(np.searchsorted(self.times, x1, 'right')) + 1, self.length)
+        count = stop - start
+        width = max(width, 1)
+        if count <= 2 * width:
+            present = ~np.isnan(self.values[start:stop])
+            return self.times[start:stop][present], self.values[start:stop][present]
+
+        # smallest bucket size giving at most `width` buckets, each drawn as 2 points (min and max)
+        level = min(int(np.ceil(np.log2(count / width))), len(self.levels)) - 1
+        size = 2 ** (level + 1)
+        low, high, done = self.levels[level]
+        first, last = start // size, min(stop // size, done)
+
+        x = np.repeat(self.times[first * size:last * size:size], 2)
+        y = np.empty(2 * (last - first))
+        y[0::2] = low[first:last]
+        y[1::2] = high[first:last]
+
+        # the last rows, not yet in a complete bucket
+        tail_y = self.values[last * size:stop]
+        if len(tail_y) and not np.isnan(tail_y).all():
+            x = np.append(x, [self.times[last * size]] * 2)
+            y = np.append(y, [np.nanmin(tail_y), np.nanmax(tail_y)])
+
+        present = ~np.isnan(y)  # buckets without the item
+        return x[present], y[present]
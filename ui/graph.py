@@ -1,45 +1,96 @@
 from __future__ import annotations
+import time
+import numpy as np
 from PyQt6 import QtWidgets
-from PyQt6.QtCore import QElapsedTimer
 import pyqtgraph as pg
+from ui.decimation import MinMaxPyramid
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from window import MainWindow
+    from data import Batch
 
+pg.setConfigOption('background', (0, 0, 0, 0))  # transparent background
+pg.setConfigOption('antialias', True)
+
+
+class RingBuffer:  # the last `size` points of a series, in preallocated arrays
+    def __init__(self, size: int) -> None:
+        self.size = size
+        # every point is written twice (at i and i + size), so the last `size` points are always contiguous
+        self.x = np.zeros(2 * size)
+        self.y = np.zeros(2 * size)
+        self.count = 0  # number of points appended since the last clear
+
+    def clear(self) -> None:
+        self.count = 0
+
+    def append(self, x: np.ndarray, y: np.ndarray) -> None:
+        # only the last `size` new points can be kept
+        x, y = x[-self.size:], y[-self.size:]
+        positions = (self.count + np.arange(len(x))) % self.size
+        self.x[positions] = x
+        self.x[positions + self.size] = x
+        self.y[positions] = y
+        self.y[positions + self.size] = y
+        self.count += len(x)
+
+    def window(self) -> tuple[np.ndarray, np.ndarray]:  # the points in the buffer, oldest first (views)
+        if self.count < self.size:
+            return self.x[:self.count], self.y[:self.count]
+        start = self.count % self.size
+        return self.x[start:start + self.size], self.y[start:start + self.size]
 
-class GraphData:  # represents one data series, a graph can contain multiple data series
 
-    def __init__(self, graph: pg.PlotWidget, name: str, color: tuple[int, int, int]) -> None:
-        self.timer = QElapsedTimer()  # used to display elapsed time on the y axis
+class GraphData:  # represents one data series, a graph can contain multiple data series
 
-        self.x = []
-        self.y = []
+    def __init__(self, graph: pg.PlotWidget, key: str, name: str, color: tuple[int, int, int], window: int) -> None:
+        self.key = key  # data item displayed
+        self.start_time = time.time()  # used to display elapsed time on the x axis
+        self.buffer = RingBuffer(window)  # last points, drawn while the graph follows the data
+        self.history = MinMaxPyramid()  # min/max of every point of the store, drawn when the view is zoomed or moved
+        self.dirty = False  # new points have been received since the last render
 
         self.data_line = graph.plot(
-            self.x,
-            self.y,
+            [],
+            [],
             pen=pg.mkPen(color=color),
             name=name
         )
 
     def reset(self) -> None:
-        self.timer.restart()
-        self.x = []
-        self.y = []
+        self.start_time = time.time()
+        self.buffer.clear()
+        self.history.clear()
+        self.dirty = True
 
-    def append(self, data: float | int) -> None:
-        self.x.append(self.timer.elapsed()/1000)  # add the time on the x axis
-        self.y.append(data)  # add the new data point on the y axis
+    def append(self, batch: Batch) -> None:
+        times, values = batch.values(self.key)
+        self.buffer.append(times - self.start_time, values)  # elapsed time on the x axis
+        # the history reads the points from the store itself
+        self.history.update(batch.store.column('time', 0, batch.stop), batch.store.column(self.key, 0, batch.stop))
+        self.dirty = True
 
-        self.data_line.setData(self.x, self.y)
+    def render(self, x_range: tuple[float, float] | None = None, width: int = 0) -> None:
+        if x_range is None:
+            # the ring buffer will be modified in place by the next points, while pyqtgraph may still use the
+            # arrays: give it a copy (of the visible points only, so a render always costs the same)
+            x, y = self.buffer.window()
+            self.data_line.setData(x.copy(), y.copy())
+        else:
+            # about 2 points per pixel of the range, with the extremes of every pixel
+            x, y = self.history.query(x_range[0] + self.start_time, x_range[1] + self.start_time, width)
+            self.data_line.setData(x - self.start_time, y)
+        self.dirty = False
 
 
 class Graph:
-    data_series = {}
+    default_window = 2000  # number of points displayed by each series, if "window" is not in ui.json
 
     def __init__(self, window: MainWindow, parent: QtWidgets.QWidget, _parent_grid: QtWidgets.QLayout, properties: dict):
         self.window = window
         self.properties = properties
+        self.keys = list(properties.get('data', {}))  # data items displayed
+        self.data_series = {}
 
         self.element = pg.PlotWidget(parent)
         self.element.setObjectName(self.properties['name'])
@@ -47,13 +98,36 @@ class Graph:
 
         for data_element, graph_properties in self.properties['data'].items():
             # create a new data series
-            self.data_series[data_element] = GraphData(self.element, graph_properties['name'], graph_properties['color'])
+            self.data_series[data_element] = GraphData(self.element, data_element,
+                                                       graph_properties['name'], graph_properties['color'],
+                                                       self.properties.get('window', self.default_window))
+
+        # when the user zooms or moves the view, the series are drawn again from their history
+        self.view_box = self.element.getViewBox()
+        self.view_box.sigXRangeChanged.connect(self.view_changed)
+
+    def set_data(self, batch: Batch, keys: list[str]):
+        # only buffer the new points, they are drawn by render()
+        for data_element in keys:
+            self.data_series[data_element].append(batch)
 
-    def set_data(self, data: dict):
-        if 'data' in self.properties:
-            for data_element, graph_properties in self.properties['data'].items():
-                if data_element in data:
-                    self.data_series[data_element].append(data[data_element])
+    def following(self) -> bool:
+        # the x axis follows the data (auto range): only the last points are drawn
+        return bool(self.view_box.autoRangeEnabled()[0])
+
+    def view_changed(self):
+        if not self.following():
+            for series in self.data_series.values():
+                series.dirty = True
+
+    def render(self):
+        # redraw the series that changed since the last frame (called at a fixed rate, whatever the data rate)
+        x_range, width = None, 0
+        if not self.following():
+            x_range, width = self.view_box.viewRange()[0], int(self.view_box.width())
+        for series in self.data_series.values():
+            if series.dirty:
+                series.render(x_range, width)
 
     def reset(self):
         for series in self.data_series.values():
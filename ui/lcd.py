@@ -1,15 +1,18 @@
 from __future__ import annotations
 from PyQt6 import QtWidgets
 from PyQt6.QtCore import Qt
+import utils
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from window import MainWindow
+    from data import Batch
 
 
 class Lcd:
     def __init__(self, window: MainWindow, parent: QtWidgets.QWidget, _parent_grid: QtWidgets.QLayout, properties: dict):
         self.window = window
         self.properties = properties
+        self.keys = [properties['data']] if 'data' in properties else []  # data items displayed
 
         # layout that will contain the label and the lcd
         self.element = QtWidgets.QHBoxLayout()
@@ -27,6 +30,24 @@ class Lcd:
         self.element.addWidget(self.label)
         self.element.addWidget(self.lcd)
 
-    def set_data(self, data):
-        if 'data' in self.properties and self.properties['data'] in data:
-            self.lcd.setProperty('value', data[self.properties['data']])
+        # the value is formatted here instead of by the lcd, so an unchanged text can be skipped
+        # "format" in ui.json (eg. "{:.1f}"), by default as many significant digits as fit in the cells of the lcd
+        # (the lcd only shows the last characters of a longer text: 1234.56 on 5 digits must be "1235", not "1234.6")
+        self.format = properties['format'].format if 'format' in properties else self.fit
+        self.text = None  # text displayed
+
+    def fit(self, value: any) -> str:
+        # the decimal point only takes a cell of the lcd when it is not drawn small
+        return utils.fit_text(value, self.lcd.digitCount(), 0 if self.lcd.smallDecimalPoint() else 1)
+
+    def set_data(self, batch: Batch, keys: list[str]):
+        value = batch.last(keys[0])  # only the most recent value is displayed
+        if value is None:
+            return
+        try:
+            text = self.format(value)
+        except (ValueError, TypeError):  # format not suited to the value (eg. "{:.1f}" for a string item)
+            text = self.fit(value)
+        if text != self.text:  # the lcd is only repainted when what it shows changes
+            self.text = text
+            self.lcd.display(text)
@@ -0,0 +1,60 @@
+from collections import deque
+
+from PyQt6 import QtWidgets
+from PyQt6.QtGui import QTextCursor
+
+
+class LogConsole:
+    # the log box: a message logged multiple times in a row is written once, with a repeat count
+    # example instead of :
+    #   warning! somethings happening
+    #   warning! somethings happening
+    #   warning! somethings happening
+    # we have :
+    #   warning! somethings happening (x3)
+    # the messages are only written once per frame, and only the last line is ever modified
+    max_lines = 1000  # older lines are removed from the box
+
+    def __init__(self, text_edit: QtWidgets.QPlainTextEdit) -> None:
+        self.text_edit = text_edit
+        self.text_edit.setMaximumBlockCount(self.max_lines)
+        self.pending = deque()  # messages not written yet (add() can be called from any thread)
+        self.last_message = None  # message on the last line
+        self.repeat = 0  # number of times it was logged in a row
+
+    def add(self, message: str, count: int = 1) -> None:
+        # count > 1: the message was logged that many times (repeats counted by the logger)
+        self.pending.append((message, count))
+
+    def render(self) -> None:
+        # write the pending messages
+        if not self.pending:
+            return
+
+        last_line = None  # new text of the last line of the box, if it is a repetition
+        lines = []  # new lines
+        while self.pending:
+            message, count = self.pending.popleft()
+            if message == self.last_message:
+                self.repeat += count
+                text = f'{message} (x{self.repeat})'
+                if lines:
+                    lines[-1] = text
+                else:
+                    last_line = text
+            else:
+                self.last_message = message
+                self.repeat = count
+                lines.append(message if count == 1 else f'{message} (x{count})')
+
+        if last_line is not None:
+            # replace the text of the last block only, the rest of the document is not touched
+            cursor = self.text_edit.textCursor()
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(last_line)
+        if lines:
+            self.text_edit.appendPlainText('\n'.join(lines))
+
+        # scroll to the end
+        self.text_edit.verticalScrollBar().setValue(self.text_edit.verticalScrollBar().maximum())
@@ -0,0 +1,174 @@
+# 3d models: the OBJ files (text, slow to parse) are converted once to binary PLY files in the cache folder,
+# named after the hash of the OBJ file, with a low-poly version shown while the full model is built
+# with "lod": true on the 3d scene in ui.json, only the low-poly version is ever shown (cheaper without a GPU)
+#
+#   python -m ui.mesh_cache     (prepare the cache of every model of ui.json, eg. before a launch)
+import os
+import json
+import hashlib
+import threading
+import time
+
+import numpy as np
+from PyQt6 import QtCore
+
+from constants import *
+from logger import Logger, DEBUG, WARNING
+
+CACHE_VERSION = 1  # changes when the cached files change, so older files are not used
+LOW_POLY_CELLS = 64  # the low-poly model keeps one vertex per cell of a grid with this many cells on its longest side
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1(f'{CACHE_VERSION}:{LOW_POLY_CELLS}:'.encode())
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_paths(path: str) -> tuple[str, str]:
+    # full and low-poly cached files of a model
+    name = os.path.join(MESH_CACHE_DIR, file_hash(path))
+    return name + '.ply', name + '.low.ply'
+
+
+def read_obj(path: str) -> tuple[np.ndarray, np.ndarray | None, np.ndarray]:
+    # vertices (n, 3), normals (n, 3) or None, triangles (m, 3)
+    # vertices using different normals in the OBJ file become different vertices
+    positions, normals, faces = [], [], []
+    with open(path, 'r') as file:
+        for line in file:
+            if line.startswith('v '):
+                positions.append(line.split()[1:4])
+            elif line.startswith('vn '):
+                normals.append(line.split()[1:4])
+            elif line.startswith('f '):
+                # "f v", "f v/vt", "f v//vn" or "f v/vt/vn", negative indexes count from the end
+                corners = []
+                for corner in line.split()[1:]:
+                    indexes = corner.split('/')
+                    position = int(indexes[0])
+                    normal = int(indexes[2]) if len(indexes) > 2 and indexes[2] else 0
+                    corners.append((position - 1 if position > 0 else len(positions) + position,
+                                    normal - 1 if normal > 0 else len(normals) + normal if normal else -1))
+                for i in range(1, len(corners) - 1):  # polygons are split into triangles (fan)
+                    faces.append((corners[0], corners[i], corners[i + 1]))
+
+    positions = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    corners = np.array(faces, dtype=np.int64).reshape(-1, 2)  # (position, normal) of every triangle corner
+    if not normals or (corners[:, 1] < 0).any():
+        return positions, None, corners[:, 0].reshape(-1, 3)
+
+    normals = np.array(normals, dtype=np.float32).reshape(-1, 3)
+    vertices, triangles = np.unique(corners, axis=0, return_inverse=True)
+    return positions[vertices[:, 0]], normals[vertices[:, 1]], triangles.reshape(-1, 3)
+
+
+def decimate(positions: np.ndarray, triangles: np.ndarray, cells: int = LOW_POLY_CELLS) -> tuple[np.ndarray, np.ndarray]:
+    # low-poly version of a mesh (vertex clustering): the vertices in the same cell of a grid are merged
+    # into their mean, and the triangles that become flat are removed
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    cell_size = max(float((high - low).max()), 1e-9) / cells
+    keys = np.floor((positions - low) / cell_size).astype(np.int64)
+    _cells, cluster = np.unique(keys, axis=0, return_inverse=True)
+    cluster = cluster.reshape(-1)
+
+    counts = np.bincount(cluster)
+    merged = np.stack([np.bincount(cluster, positions[:, axis]) for axis in range(3)], axis=1) / counts[:, None]
+
+    triangles = cluster[triangles]
+    flat = ((triangles[:, 0] == triangles[:, 1]) | (triangles[:, 1] == triangles[:, 2])
+            | (triangles[:, 0] == triangles[:, 2]))
+    triangles = np.unique(triangles[~flat], axis=0)
+    return merged.astype(np.float32), triangles
+
+
+def write_ply(path: str, positions: np.ndarray, normals: np.ndarray | None, triangles: np.ndarray) -> None:
+    # binary PLY (loaded by Qt3D), written to a temporary file first so a partial file is never used
+    properties = ['x', 'y', 'z'] + (['nx', 'ny', 'nz'] if normals is not None else [])
+    header = ['ply', 'format binary_little_endian 1.0', f'element vertex {len(positions)}']
+    header += [f'property float {name}' for name in properties]
+    header += [f'element face {len(triangles)}', 'property list uchar int vertex_indices', 'end_header']
+
+    vertices = positions if normals is None else np.hstack([positions, normals])
+    faces = np.zeros(len(triangles), dtype=[('count', 'u1'), ('indexes', '<i4', (3,))])
+    faces['count'] = 3
+    faces['indexes'] = triangles
+
+    with open(path + '.tmp', 'wb') as file:
+        file.write(('\n'.join(header) + '\n').encode('ascii'))
+        file.write(vertices.astype('<f4').tobytes())
+        file.write(faces.tobytes())
+    os.replace(path + '.tmp', path)
+
+
+def prepare(path: str, on_ready=None, lod: bool = False) -> str:
+    # build the cached files of a model if needed, and return the file to show (the low-poly one if lod)
+    # on_ready(file) is called with every file to show, in order: when the full file has to be built,
+    # the low-poly one is shown meanwhile. a file already in the cache is shown alone
+    full_path, low_path = cache_paths(path)
+    shown = low_path if lod else full_path
+    if os.path.exists(shown):
+        if on_ready is not None:
+            on_ready(shown)
+        return shown
+
+    os.makedirs(MESH_CACHE_DIR, exist_ok=True)
+    positions, normals, triangles = read_obj(path)
+    low_positions, low_triangles = decimate(positions, triangles)
+    write_ply(low_path, low_positions, None, low_triangles)
+    if on_ready is not None:
+        on_ready(low_path)
+    if not lod:
+        write_ply(full_path, positions, normals, triangles)
+        if on_ready is not None:
+            on_ready(full_path)
+    return shown
+
+
+class MeshLoader(QtCore.QObject):
+    # prepares a model in a thread: `ready` is emitted (in the GUI thread) with every file to show (see prepare())
+    # other formats than OBJ are used as they are
+    ready = QtCore.pyqtSignal(str)
+
+    def __init__(self, path: str, lod: bool = False, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        self.logger = Logger()
+        self.path = path
+        self.lod = lod
+
+    def start(self) -> None:
+        if not self.path.lower().endswith('.obj'):
+            self.ready.emit(self.path)
+            return
+        threading.Thread(target=self.load, name='mesh loader', daemon=True).start()
+
+    def load(self) -> None:
+        start = time.perf_counter()
+        try:
+            prepare(self.path, self.ready.emit, self.lod)
+        except Exception as e:  # the OBJ file is still loaded by Qt3D, only slower
+            self.logger.log(f'Could not prepare the 3d model {self.path}: {e}', level=WARNING)
+            self.ready.emit(self.path)
+            return
+        self.logger.log(f'3d model {self.path} ready in {time.perf_counter() - start:.2f}s', level=DEBUG)
+
+
+def ui_models(elements: list[dict]) -> set[str]:
+    # OBJ models used by the elements of ui.json (and the elements of their boxes)
+    models = set()
+    for element in elements:
+        if element.get('model', '').lower().endswith('.obj'):
+            models.add(element['model'])
+        models |= ui_models(element.get('content', []))
+    return models
+
+
+if __name__ == '__main__':
+    with open('ui.json', 'r') as file:
+        models = ui_models(json.load(file))
+    for model in sorted(models):
+        prepare(model)
+        for cached in cache_paths(model):
+            print(f'{model} -> {cached} ({os.path.getsize(cached) / 1000:.0f} kB)')
@@ -1,14 +1,22 @@
 from __future__ import annotations
+import time
 from PyQt6 import QtWidgets
-from PyQt6.QtCore import QUrl
+from PyQt6.QtCore import QUrl, QTimer
 from PyQt6.QtGui import *
 from PyQt6.Qt3DCore import *
 from PyQt6.Qt3DExtras import *
 from PyQt6.Qt3DRender import *
 from typing import TYPE_CHECKING
 
+from ui.mesh_cache import MeshLoader
+
 if TYPE_CHECKING:
     from window import MainWindow
+    from data import Batch
+
+
+# rotation from the sensor frame (z up) to the scene frame (y up)
+SENSOR_TO_SCENE = QQuaternion.fromAxisAndAngle(1, 0, 0, -90)
 
 
 class RocketView3D(Qt3DWindow):
@@ -37,14 +45,14 @@ def create_bar(root_entity) -> (QEntity, QTransform, QCylinderMesh):  # bars for
     return bar_entity, bar_transform, bar_material, bar_mesh
 
 
-def create_scene(model_file: str) -> tuple[QEntity, QTransform]:
+def create_scene() -> tuple[QEntity, QTransform, QMesh]:
     root_entity = QEntity()
 
     # create the rocket enity with its mesh, material and transform
+    # (the source of the mesh is set once the 3d model is loaded, see MeshLoader)
 
     rocket_entity = QEntity(root_entity)
     rocket_mesh = QMesh(None)
-    rocket_mesh.setSource(QUrl.fromLocalFile(model_file))  # load the 3d model into the mesh
 
     rocket_material = QPhongMaterial(None)
     rocket_material.setDiffuse(QColorConstants.LightGray)
@@ -75,25 +83,48 @@ def create_scene(model_file: str) -> tuple[QEntity, QTransform]:
     z_bar_material.setAmbient(QColorConstants.Blue)
     z_bar_material.setDiffuse(QColorConstants.Blue)
 
-    return root_entity, rocket_transform
+    return root_entity, rocket_transform, rocket_mesh
 
 
 class Scene3D:
     def __init__(self, window: MainWindow, _parent: QtWidgets.QWidget, _parent_grid: QtWidgets.QLayout, properties: dict):
         self.window = window
         self.properties = properties
-
+        self.keys = list(properties.get('data', {}).values())  # data items displayed (orientation quaternion)
+        self.previous = self.latest = None  # last two orientations received: (reception time, quaternion)
+        self.rendered = None  # position between them of the orientation displayed
+
+        # rotation of the model so it is upright when the orientation is the identity ("model_rotation" in ui.json,
+        # euler angles in degrees around x, y, z)
+        self.model_rotation = QQuaternion.fromEulerAngles(*properties.get('model_rotation', [0, 0, 0]))
+
+        # the 3d view (Qt3D renderer, GL context) is created after the window is shown, so it does not
+        # delay the first paint: until then the element is an empty widget
+        self.element = QtWidgets.QWidget()
+        self.layout = QtWidgets.QVBoxLayout(self.element)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.rocket_transform = None
+        QTimer.singleShot(0, self.create_view)
+
+    def create_view(self):
+        properties = self.properties
         view_3d = RocketView3D(None)
         # set the background of the scene to be the same as the background of the window
         # TODO: do this automatically (from the stylesheet)
         background_color = QColor().fromRgb(238, 238, 238)
         view_3d.defaultFrameGraph().setClearColor(background_color)
-        self.element = QtWidgets.QWidget.createWindowContainer(view_3d)
+        self.layout.addWidget(QtWidgets.QWidget.createWindowContainer(view_3d))
 
-        self.view_scene, self.rocket_transform = create_scene(properties['model'])
+        self.view_scene, self.rocket_transform, self.rocket_mesh = create_scene()
         if 'scale' in properties:  # scale the model if needed
             self.rocket_transform.setScale(properties['scale'])
 
+        # the model is loaded in a thread (low-poly version first if it is not cached yet), the scene is usable
+        # meanwhile. "lod": true in ui.json keeps the low-poly version (for software rendering)
+        self.mesh_loader = MeshLoader(properties['model'], properties.get('lod', False), self.element)
+        self.mesh_loader.ready.connect(self.set_model)
+        self.mesh_loader.start()
+
         view_cam = view_3d.camera()
         view_cam.lens().setPerspectiveProjection(50, 16 / 9, 0.1, 1000)
         view_cam.setPosition(QVector3D(30, 30, -30))
@@ -107,10 +138,35 @@ class Scene3D:
         view_3d.setRootEntity(self.view_scene)
         view_3d.show()
 
-    def set_data(self, data):
-        if 'data' in self.properties:
-            data_properties = self.properties['data']
-            # -90 so the rocket is upright (probably not right)
-            self.rocket_transform.setRotationX(data[data_properties['roll']] - 90)
-            self.rocket_transform.setRotationY(data[data_properties['pitch']])
-            self.rocket_transform.setRotationZ(data[data_properties['yaw']])
+    def set_model(self, path: str):
+        self.rocket_mesh.setSource(QUrl.fromLocalFile(path))
+
+    def set_data(self, batch: Batch, keys: list[str]):
+        # keep the last two orientations received, render() moves the model between them
+        data_properties = self.properties['data']
+        times, w = batch.values(data_properties['w'])
+        if not len(w):
+            return
+        x, y, z = (batch.values(data_properties[axis])[1] for axis in ('x', 'y', 'z'))
+        samples = [(times[i], QQuaternion(w[i], x[i], y[i], z[i])) for i in range(max(len(w) - 2, 0), len(w))]
+        if len(samples) == 1:
+            samples.insert(0, self.latest)
+        self.previous, self.latest = samples
+        self.rendered = None
+
+    def render(self):
+        # one orientation per displayed frame: interpolated (slerp) between the last two samples,
+        # one sample late, so the movement stays smooth whatever the data rate
+        if self.latest is None or self.rocket_transform is None:
+            return
+        if self.previous is None or self.latest[0] <= self.previous[0]:
+            fraction = 1
+        else:
+            fraction = min(max((time.time() - self.latest[0]) / (self.latest[0] - self.previous[0]), 0), 1)
+        if fraction == self.rendered:  # the model has not moved since the last frame
+            return
+        self.rendered = fraction
+
+        q = self.latest[1] if fraction == 1 else QQuaternion.slerp(self.previous[1], self.latest[1], fraction)
+        # the sensor frame has z up, the scene has y up
+        self.rocket_transform.setRotation(SENSOR_TO_SCENE * q * SENSOR_TO_SCENE.conjugated() * self.model_rotation)
@@ -1,15 +1,5 @@
 import os
 
-from PyQt6 import QtCore
-
-
-# create a QTimer in one line instead of 4
-def init_qtimer(parent, interval: int, connector) -> None:
-    timer = QtCore.QTimer(parent)
-    timer.setInterval(interval)
-    timer.timeout.connect(connector)
-    timer.start()
-
 
 # recursively get a folder's size
 def get_dir_size(path: str) -> int:
@@ -21,3 +11,16 @@ def get_dir_size(path: str) -> int:
             elif entry.is_dir():
                 total += get_dir_size(entry.path)
     return total
+
+
+# text of a value in at most `width` characters (sign and decimal point included): the numbers lose precision
+# until they fit (like QLCDNumber.display(float)), other values are cut
+def fit_text(value: any, width: int, point_width: int = 1) -> str:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return str(value)[:width]
+    text = str(value)
+    for precision in range(width, 0, -1):
+        text = f'{value:.{precision}g}'
+        if len(text) - text.count('.') * (1 - point_width) <= width:
+            return text
+    return text  # too large even with 1 digit (eg. 1e+100 on 4 digits)